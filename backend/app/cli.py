@@ -0,0 +1,56 @@
+"""
+One-shot administrative commands, run once per deployment instead of in every
+worker's lifespan.
+
+Usage: python -m app.cli
+"""
+import asyncio
+import logging
+
+from beanie import init_beanie
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from .auth.auth import get_hashed_password
+from .config.config import settings
+from .config.logging import setup_loggers
+from .models.users import User
+
+logger = logging.getLogger(__name__)
+
+
+async def ensure_superuser() -> User:
+    """Create the FIRST_SUPERUSER account if it doesn't exist yet.
+
+    Expects Beanie to be initialized with the User model.
+    """
+    user = await User.find_one({"email": settings.FIRST_SUPERUSER})
+    if not user:
+        user = User(
+            email=settings.FIRST_SUPERUSER,
+            hashed_password=get_hashed_password(settings.FIRST_SUPERUSER_PASSWORD),
+            is_superuser=True,
+        )
+        await user.create()
+        logger.info("Created superuser %s", settings.FIRST_SUPERUSER)
+    return user
+
+
+async def main():
+    client = AsyncIOMotorClient(
+        settings.MONGO_HOST,
+        settings.MONGO_PORT,
+        username=settings.MONGO_USER,
+        password=settings.MONGO_PASSWORD,
+        serverSelectionTimeoutMS=5000,
+    )
+    try:
+        # Always create indexes here, so workers can start with ENSURE_INDEXES=False
+        await init_beanie(database=client[settings.MONGO_DB], document_models=[User])
+        await ensure_superuser()
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    setup_loggers()
+    asyncio.run(main())
@@ -18,8 +18,12 @@ class Settings(BaseSettings):
     ENVIRONMENT: Literal["development", "test", "production"] = "development"
     # 60 minutes * 24 hours * 8 days = 8 days
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
-    # JSON-formatted list of origins
-    BACKEND_CORS_ORIGINS: list[AnyHttpUrl] = []
+    # JSON-formatted list of origins (defaults to the local frontend dev servers)
+    BACKEND_CORS_ORIGINS: list[AnyHttpUrl] = [
+        "http://localhost:5173",  # type: ignore[list-item]
+        "http://localhost:3000",  # type: ignore[list-item]
+        "http://127.0.0.1:5173",  # type: ignore[list-item]
+    ]
     PROJECT_NAME: str
     FIRST_SUPERUSER: EmailStr
     FIRST_SUPERUSER_PASSWORD: str
@@ -30,6 +34,14 @@ class Settings(BaseSettings):
     MONGO_USER: str | None = None
     MONGO_PASSWORD: str | None = None
     MONGO_DB: str
+    MONGO_MIN_POOL_SIZE: int = 10
+    MONGO_MAX_POOL_SIZE: int = 50
+    # Create model indexes on startup; set to False once a deployment has them
+    ENSURE_INDEXES: bool = True
+
+    # Worker processes parsing large product metadata files at startup; 0 parses
+    # them in the loading process
+    METADATA_SCAN_WORKERS: int = 0
 
     # SSO ID and Secrets
     GOOGLE_CLIENT_ID: str | None = None
@@ -1,3 +1,5 @@
+import atexit
+import logging
 import logging.config
 
 LOGGING_CONFIG = {
@@ -13,10 +15,17 @@ LOGGING_CONFIG = {
             "class": "logging.StreamHandler",
             # "stream": "ext://sys.stdout",
         },
+        # Records are handed to a background listener thread, so callers on the
+        # event loop never block on stream I/O.
+        "queue": {
+            "class": "logging.handlers.QueueHandler",
+            "handlers": ["default"],
+            "respect_handler_level": True,
+        },
     },
     "loggers": {
         "": {  # root logger
-            "handlers": ["default"],
+            "handlers": ["queue"],
             "level": "INFO",
             "propagate": True,
         },
@@ -27,3 +36,7 @@ LOGGING_CONFIG = {
 
 def setup_loggers():
     logging.config.dictConfig(LOGGING_CONFIG)
+    queue_handler = logging.getHandlerByName("queue")
+    if queue_handler is not None and queue_handler.listener is not None:
+        queue_handler.listener.start()
+        atexit.register(queue_handler.listener.stop)
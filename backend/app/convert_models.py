@@ -0,0 +1,23 @@
+"""
+One-time conversion of the sparse model matrices to memory-mappable joblib files.
+
+The recommendation service loads ml/models/<name>.joblib with mmap_mode='r' when it
+was converted from the current <name>.npz, so rows are paged in on demand instead
+of the whole matrix being read at startup. Re-run after retraining the models.
+
+Usage: python -m app.convert_models
+"""
+from .services.model_files import SPARSE_MATRICES, convert_sparse_matrix
+
+
+def main():
+    for name in SPARSE_MATRICES:
+        out_path = convert_sparse_matrix(name)
+        if out_path is None:
+            print(f"⚠️ {name}.npz not found, skipping")
+            continue
+        print(f"✅ Wrote {out_path.name}")
+
+
+if __name__ == "__main__":
+    main()
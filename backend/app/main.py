@@ -1,11 +1,25 @@
+import logging
 from contextlib import asynccontextmanager
+from functools import cache
 
-from fastapi import FastAPI
+import orjson
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.openapi.docs import (
+    get_redoc_html,
+    get_swagger_ui_html,
+    get_swagger_ui_oauth2_redirect_html,
+)
+from fastapi.responses import HTMLResponse, ORJSONResponse
 
 from .config.config import settings
+from .config.logging import setup_loggers
 from .routers.api import api_router
 
+setup_loggers()
+logger = logging.getLogger(__name__)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -13,7 +27,6 @@ async def lifespan(app: FastAPI):
     try:
         from beanie import init_beanie
         from motor.motor_asyncio import AsyncIOMotorClient
-        from .auth.auth import get_hashed_password
         from .models.users import User
         
         app.state.client = AsyncIOMotorClient(
@@ -22,45 +35,91 @@ async def lifespan(app: FastAPI):
             username=settings.MONGO_USER,
             password=settings.MONGO_PASSWORD,
             serverSelectionTimeoutMS=5000,
+            minPoolSize=settings.MONGO_MIN_POOL_SIZE,
+            maxPoolSize=settings.MONGO_MAX_POOL_SIZE,
         )
+        # Open the pool before serving traffic so the first request doesn't pay for it
+        await app.state.client.admin.command("ping")
         await init_beanie(
-            database=app.state.client[settings.MONGO_DB], document_models=[User]
+            database=app.state.client[settings.MONGO_DB],
+            document_models=[User],
+            allow_index_dropping=False,
+            skip_indexes=not settings.ENSURE_INDEXES,
         )
-
-        user = await User.find_one({"email": settings.FIRST_SUPERUSER})
-        if not user:
-            user = User(
-                email=settings.FIRST_SUPERUSER,
-                hashed_password=get_hashed_password(settings.FIRST_SUPERUSER_PASSWORD),
-                is_superuser=True,
-            )
-            await user.create()
-
-        print("✅ MongoDB connected successfully!")
+        # The FIRST_SUPERUSER account is created once per deployment by app.cli
+        logger.info("MongoDB connected successfully")
         app.state.mongodb_available = True
     except Exception as e:
-        print(f"⚠️ MongoDB not available: {e}")
-        print("   Recommendations API will still work!")
+        logger.warning("MongoDB not available: %s", e)
+        logger.warning("Recommendations API will still work")
         app.state.mongodb_available = False
 
+    # Build and encode the OpenAPI schema (every route and response model) before
+    # the first docs request instead of during it.
+    _openapi_bytes()
+
     yield
 
 
+OPENAPI_URL = f"{settings.API_V1_STR}/openapi.json"
+
+
 app = FastAPI(
     title="E-Commerce Recommendation System",
     description="AI-powered product recommendations for e-commerce",
     version="1.0.0",
-    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    # The schema and docs routes are registered below, so the schema is served
+    # from bytes encoded once instead of FastAPI re-encoding it on every request.
+    openapi_url=None,
+    docs_url=None,
+    redoc_url=None,
+    default_response_class=ORJSONResponse,
     lifespan=lifespan,
 )
 
-# Set all CORS enabled origins
+# Set all CORS enabled origins. An explicit list lets the middleware answer with a
+# set lookup, and max_age lets browsers cache preflight responses for a day.
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=[str(origin).rstrip("/") for origin in settings.BACKEND_CORS_ORIGINS],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    max_age=86400,
 )
 
+# Compress list responses (repeated field names and category strings); added last so
+# it wraps CORS and also compresses its responses. Small bodies are sent as-is.
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
+
+
+@cache
+def _openapi_bytes() -> bytes:
+    """Build and encode the OpenAPI schema once; lifespan warms it at startup."""
+    return orjson.dumps(app.openapi())
+
+
+@app.get(OPENAPI_URL, include_in_schema=False)
+async def openapi() -> Response:
+    return Response(content=_openapi_bytes(), media_type="application/json")
+
+
+@app.get("/docs", include_in_schema=False)
+async def swagger_ui_html() -> HTMLResponse:
+    return get_swagger_ui_html(
+        openapi_url=OPENAPI_URL,
+        title=f"{app.title} - Swagger UI",
+        oauth2_redirect_url="/docs/oauth2-redirect",
+    )
+
+
+@app.get("/docs/oauth2-redirect", include_in_schema=False)
+async def swagger_ui_redirect() -> HTMLResponse:
+    return get_swagger_ui_oauth2_redirect_html()
+
+
+@app.get("/redoc", include_in_schema=False)
+async def redoc_html() -> HTMLResponse:
+    return get_redoc_html(openapi_url=OPENAPI_URL, title=f"{app.title} - ReDoc")
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Request
+import orjson
+from fastapi import APIRouter, Request, Response
 
 from . import recommendations, demand
 
@@ -19,23 +20,34 @@ api_router.include_router(
 )
 
 
+# Root and health payloads never change shape, so encode them once at import.
+_ROOT_BYTES = orjson.dumps({
+    "message": "E-Commerce Recommendation API",
+    "version": "1.0.0",
+    "endpoints": {
+        "recommendations": "/api/v1/recommendations",
+        "docs": "/api/v1/docs"
+    }
+})
+_HEALTH_OK = orjson.dumps({
+    "status": "healthy",
+    "mongodb": "connected",
+    "recommendations": "available"
+})
+_HEALTH_NO_MONGO = orjson.dumps({
+    "status": "healthy",
+    "mongodb": "not_connected",
+    "recommendations": "available"
+})
+
+
 @api_router.get("/")
 async def root():
-    return {
-        "message": "E-Commerce Recommendation API",
-        "version": "1.0.0",
-        "endpoints": {
-            "recommendations": "/api/v1/recommendations",
-            "docs": "/api/v1/docs"
-        }
-    }
+    return Response(content=_ROOT_BYTES, media_type="application/json")
 
 
 @api_router.get("/health")
 async def health_check(request: Request):
     mongodb_status = getattr(request.app.state, 'mongodb_available', False)
-    return {
-        "status": "healthy",
-        "mongodb": "connected" if mongodb_status else "not_connected",
-        "recommendations": "available"
-    }
+    body = _HEALTH_OK if mongodb_status else _HEALTH_NO_MONGO
+    return Response(content=body, media_type="application/json")
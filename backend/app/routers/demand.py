@@ -1,14 +1,23 @@
 """
 Demand Analytics API endpoints.
 """
-from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel
-from typing import Optional
+import hashlib
+
+import orjson
+from fastapi import APIRouter, HTTPException, Path, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic.main import BaseModel
+from starlette.concurrency import run_in_threadpool
+from typing import Annotated, Any, Callable, Hashable, Iterator, Optional
 
 from ..services.demand_service import demand_service
 
 router = APIRouter()
 
+# Amazon ASINs are 10 uppercase alphanumerics; anything else is rejected with a 422
+# before the handler runs.
+AsinPath = Annotated[str, Path(pattern=r"^[A-Z0-9]{10}$", description="Product ASIN")]
+
 
 # Pydantic models
 class DemandStats(BaseModel):
@@ -29,10 +38,11 @@ class TopProduct(BaseModel):
     avg_rating: Optional[float] = None
 
 
-class TimeSeriesPoint(BaseModel):
-    week: str
-    demand: int
-    rating: Optional[float] = None
+class TimeSeries(BaseModel):
+    """Weekly series as parallel columns: weeks[i], demand[i], rating[i]."""
+    weeks: list[str]
+    demand: list[int]
+    rating: list[Optional[float]]
 
 
 class ProductDemand(BaseModel):
@@ -43,7 +53,7 @@ class ProductDemand(BaseModel):
     max_demand: int
     min_demand: int
     trend: str
-    time_series: list[TimeSeriesPoint]
+    time_series: TimeSeries
 
 
 class OverallTrend(BaseModel):
@@ -75,56 +85,133 @@ class ProductForecast(BaseModel):
     combined: list[ForecastPoint]
 
 
+# Service payloads carry numpy scalars (np.float64 from means/rounding); orjson
+# encodes them natively instead of falling back to per-value conversion.
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY
+
+# Aggregates only change when the demand data is reloaded, so let browsers and
+# proxies reuse them and revalidate with If-None-Match.
+CACHE_CONTROL = "public, max-age=300, stale-while-revalidate=60"
+
+
+# Encoded body and ETag of each cached endpoint, by key; an entry is rebuilt when
+# the demand data generation it was encoded from is stale.
+_encoded: dict[Hashable, tuple[int, bytes, str]] = {}
+
+
+def _cacheable_response(
+    request: Request, key: Hashable, build: Callable[[], Any]
+) -> Response:
+    """Serve build()'s payload with a weak ETag, answering 304 if the client has it.
+
+    The payload is encoded and hashed once per data generation. The ETag is weak
+    because GZipMiddleware may send the same entity with a different encoding.
+    """
+    generation = demand_service.generation
+    entry = _encoded.get(key)
+    if entry is None or entry[0] != generation:
+        body = orjson.dumps(build(), option=ORJSON_OPTIONS)
+        etag = f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+        entry = _encoded[key] = (generation, body, etag)
+    _, body, etag = entry
+    headers = {"etag": etag, "cache-control": CACHE_CONTROL}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        # If-None-Match uses the weak comparison, so W/ prefixes are ignored
+        opaque = etag.removeprefix("W/")
+        tags = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+        if opaque in tags:
+            return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _json_response(payload: Any) -> Response:
+    """Encode service output straight to JSON bytes, skipping model validation."""
+    body = orjson.dumps(payload, option=ORJSON_OPTIONS)
+    return Response(content=body, media_type="application/json")
+
+
+# Series longer than a year of weeks are streamed in chunks of STREAM_CHUNK_SIZE
+# values, so the first bytes reach the client before the whole body is encoded.
+STREAM_THRESHOLD = 52
+STREAM_CHUNK_SIZE = 26
+
+
+def _stream_product_demand(data: dict) -> Iterator[bytes]:
+    """Yield the product demand payload as JSON, one column chunk at a time."""
+    head = {k: v for k, v in data.items() if k != "time_series"}
+    # Re-open the encoded head object to append the time_series member
+    yield orjson.dumps(head, option=ORJSON_OPTIONS)[:-1] + b',"time_series":{'
+    for i, (name, column) in enumerate(data["time_series"].items()):
+        yield (b"," if i else b"") + orjson.dumps(name) + b":["
+        for start in range(0, len(column), STREAM_CHUNK_SIZE):
+            chunk = column[start:start + STREAM_CHUNK_SIZE]
+            # Strip the brackets so consecutive chunks form one array
+            body = orjson.dumps(chunk, option=ORJSON_OPTIONS)[1:-1]
+            yield (b"," if start else b"") + body
+        yield b"]"
+    yield b"}}"
+
+
 @router.get("/stats", response_model=DemandStats)
-async def get_demand_stats():
+async def get_demand_stats(request: Request):
     """Get overall demand statistics."""
-    stats = demand_service.get_stats()
-    return DemandStats(**stats)
+    return _cacheable_response(
+        request, "stats", lambda: DemandStats(**demand_service.get_stats()).model_dump()
+    )
 
 
-@router.get("/top-products", response_model=list[TopProduct])
+@router.get("/top-products", responses={200: {"model": list[TopProduct]}})
 async def get_top_products(
+    request: Request,
     limit: int = Query(20, ge=1, le=100, description="Number of products")
 ):
     """Get top products by total demand."""
-    products = demand_service.get_top_products(limit)
-    return [TopProduct(**p) for p in products]
+    return _cacheable_response(
+        request, ("top-products", limit), lambda: demand_service.get_top_products(limit)
+    )
 
 
-@router.get("/product/{asin}", response_model=ProductDemand)
-async def get_product_demand(asin: str):
+@router.get("/product/{asin}", responses={200: {"model": ProductDemand}})
+async def get_product_demand(asin: AsinPath):
     """Get demand time series for a specific product."""
     data = demand_service.get_product_demand(asin)
     if not data:
         raise HTTPException(status_code=404, detail="Product not found")
-    return ProductDemand(**data)
+    if len(data["time_series"]["weeks"]) > STREAM_THRESHOLD:
+        return StreamingResponse(
+            _stream_product_demand(data), media_type="application/json"
+        )
+    return _json_response(data)
 
 
-@router.get("/overall-trend", response_model=list[OverallTrend])
-async def get_overall_trend():
+@router.get("/overall-trend", responses={200: {"model": list[OverallTrend]}})
+async def get_overall_trend(request: Request):
     """Get overall demand trend aggregated by week."""
-    trend = demand_service.get_overall_trend()
-    return [OverallTrend(**t) for t in trend]
+    return _cacheable_response(
+        request, "overall-trend", demand_service.get_overall_trend
+    )
 
 
-@router.get("/categories", response_model=list[CategoryDemand])
-async def get_category_demand():
+@router.get("/categories", responses={200: {"model": list[CategoryDemand]}})
+async def get_category_demand(request: Request):
     """Get demand breakdown by category."""
-    categories = demand_service.get_category_demand()
-    return [CategoryDemand(**c) for c in categories]
+    return _cacheable_response(
+        request, "categories", demand_service.get_category_demand
+    )
 
 
-@router.get("/forecast/{asin}", response_model=ProductForecast)
+@router.get("/forecast/{asin}", responses={200: {"model": ProductForecast}})
 async def get_product_forecast(
-    asin: str,
+    asin: AsinPath,
     weeks: int = Query(8, ge=1, le=16, description="Number of weeks to forecast")
 ):
     """Generate demand forecast for a specific product."""
-    forecast = demand_service.generate_forecast(asin, weeks)
+    forecast = await run_in_threadpool(demand_service.generate_forecast, asin, weeks)
     if not forecast:
         raise HTTPException(
             status_code=404, 
             detail="Product not found or insufficient data for forecasting"
         )
-    return ProductForecast(**forecast)
+    return _json_response(forecast)
 
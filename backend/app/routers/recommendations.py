@@ -1,14 +1,58 @@
 """
 Recommendation API endpoints.
 """
-from fastapi import APIRouter, HTTPException, Query
-from pydantic import BaseModel
-from typing import Optional
+import asyncio
+from functools import partial
+
+import msgspec
+from cachetools import TTLCache
+from fastapi import APIRouter, HTTPException, Path, Query, Request
+from pydantic.main import BaseModel
+from starlette.concurrency import run_in_threadpool
+from typing import Annotated, Callable, Optional
 
 from ..services.recommendation_service import recommendation_service
 
 router = APIRouter()
 
+# Amazon ASINs are 10 uppercase alphanumerics; anything else is rejected with a 422
+# before the handler runs.
+ASIN_PATTERN = r"^[A-Z0-9]{10}$"
+AsinPath = Annotated[str, Path(pattern=ASIN_PATTERN, description="Product ASIN")]
+
+# Cache of service results (plain dicts/lists) keyed by the request parameters.
+# Keys include the service generation so a model reload invalidates old entries.
+_cache: TTLCache = TTLCache(maxsize=10_000, ttl=300)
+# Computations currently running, so concurrent misses for one key share a result.
+_inflight: dict[tuple, asyncio.Future] = {}
+
+
+def _finish(key: tuple, task: asyncio.Future):
+    """Drop a finished computation from the in-flight map and cache its result."""
+    _inflight.pop(key, None)
+    if not task.cancelled() and task.exception() is None:
+        _cache[key] = task.result()
+
+
+async def _cached(method: str, func: Callable, *args):
+    """Return func(*args), reusing a cached result for the same method and args.
+
+    Misses run in the threadpool so KNN / TF-IDF work doesn't block the event loop,
+    and requests arriving while a miss is being computed await the same task.
+    """
+    key = (recommendation_service.generation, method, *args)
+    try:
+        return _cache[key]
+    except KeyError:
+        pass
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(run_in_threadpool(func, *args))
+        task.add_done_callback(partial(_finish, key))
+        _inflight[key] = task
+    # Shielded so one client disconnecting doesn't cancel the work for the others
+    return await asyncio.shield(task)
+
 
 # Pydantic models
 class ProductDetails(BaseModel):
@@ -45,6 +89,25 @@ class RecommendationResponse(BaseModel):
     recommendations: list[RecommendationItem]
 
 
+class BatchRecommendationResponse(BaseModel):
+    method: str
+    results: dict[str, list[RecommendationItem]]
+
+
+class BatchReq(msgspec.Struct, forbid_unknown_fields=True):
+    """Batch request body, decoded and validated by msgspec in a single pass."""
+    asins: Annotated[
+        list[Annotated[str, msgspec.Meta(pattern=ASIN_PATTERN)]],
+        msgspec.Meta(min_length=1, max_length=50, description="Product ASINs"),
+    ]
+    n: Annotated[
+        int, msgspec.Meta(ge=1, le=20, description="Recommendations per product")
+    ] = 6
+
+
+_BATCH_REQ_SCHEMA = msgspec.json.schema(BatchReq)["$defs"]["BatchReq"]
+
+
 class ProductListResponse(BaseModel):
     products: list[ProductDetails]
     total: int
@@ -67,14 +130,13 @@ async def get_recommendation_stats():
     return RecommendationStats(**stats)
 
 
-@router.get("/products", response_model=ProductListResponse)
+@router.get("/products", responses={200: {"model": ProductListResponse}})
 async def get_available_products(
     limit: int = Query(20, ge=1, le=100, description="Max products to return"),
     offset: int = Query(0, ge=0, description="Offset for pagination")
 ):
     """Get paginated list of products with details."""
-    result = recommendation_service.get_available_products(limit, offset)
-    return ProductListResponse(**result)
+    return recommendation_service.get_available_products(limit, offset)
 
 
 @router.get("/search")
@@ -88,7 +150,7 @@ async def search_products(
 
 
 @router.get("/product/{product_asin}", response_model=ProductDetails)
-async def get_product_details(product_asin: str):
+async def get_product_details(product_asin: AsinPath):
     """Get detailed information about a specific product."""
     details = recommendation_service.get_product_details(product_asin)
     if not details:
@@ -96,9 +158,11 @@ async def get_product_details(product_asin: str):
     return ProductDetails(**details)
 
 
-@router.get("/collaborative/{product_asin}", response_model=RecommendationResponse)
+@router.get(
+    "/collaborative/{product_asin}", responses={200: {"model": RecommendationResponse}}
+)
 async def get_collaborative_recommendations(
-    product_asin: str,
+    product_asin: AsinPath,
     n: int = Query(6, ge=1, le=20, description="Number of recommendations")
 ):
     """
@@ -108,24 +172,59 @@ async def get_collaborative_recommendations(
     if not recommendation_service.is_ready:
         raise HTTPException(status_code=503, detail="Models not loaded")
     
-    recommendations = recommendation_service.get_collaborative_recommendations(product_asin, n)
+    recommendations = await _cached(
+        "collaborative",
+        recommendation_service.get_collaborative_recommendations,
+        product_asin,
+        n,
+    )
     
     if not recommendations:
         raise HTTPException(status_code=404, detail=f"Product {product_asin} not found")
     
     source = recommendation_service.get_product_details(product_asin)
     
-    return RecommendationResponse(
-        product_asin=product_asin,
-        method="collaborative",
-        source_product=ProductDetails(**source) if source else None,
-        recommendations=[RecommendationItem(**r) for r in recommendations]
+    return {
+        "product_asin": product_asin,
+        "method": "collaborative",
+        "source_product": source,
+        "recommendations": recommendations
+    }
+
+
+@router.post(
+    "/content/batch",
+    responses={200: {"model": BatchRecommendationResponse}},
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": _BATCH_REQ_SCHEMA}},
+        }
+    },
+)
+async def get_content_recommendations_batch(request: Request):
+    """
+    Content-Based recommendations for many products in one request.
+    Computes TF-IDF similarities for all ASINs with a single matrix product.
+    """
+    try:
+        req = msgspec.json.decode(await request.body(), type=BatchReq)
+    except msgspec.DecodeError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    if not recommendation_service.is_ready:
+        raise HTTPException(status_code=503, detail="Models not loaded")
+
+    results = await run_in_threadpool(
+        recommendation_service.get_content_recommendations_batch, req.asins, req.n
     )
 
+    return {"method": "content", "results": results}
 
-@router.get("/content/{product_asin}", response_model=RecommendationResponse)
+
+@router.get("/content/{product_asin}", responses={200: {"model": RecommendationResponse}})
 async def get_content_recommendations(
-    product_asin: str,
+    product_asin: AsinPath,
     n: int = Query(6, ge=1, le=20, description="Number of recommendations")
 ):
     """
@@ -135,24 +234,26 @@ async def get_content_recommendations(
     if not recommendation_service.is_ready:
         raise HTTPException(status_code=503, detail="Models not loaded")
     
-    recommendations = recommendation_service.get_content_recommendations(product_asin, n)
+    recommendations = await _cached(
+        "content", recommendation_service.get_content_recommendations, product_asin, n
+    )
     
     if not recommendations:
         raise HTTPException(status_code=404, detail=f"Product {product_asin} not found")
     
     source = recommendation_service.get_product_details(product_asin)
     
-    return RecommendationResponse(
-        product_asin=product_asin,
-        method="content",
-        source_product=ProductDetails(**source) if source else None,
-        recommendations=[RecommendationItem(**r) for r in recommendations]
-    )
+    return {
+        "product_asin": product_asin,
+        "method": "content",
+        "source_product": source,
+        "recommendations": recommendations
+    }
 
 
-@router.get("/hybrid/{product_asin}", response_model=RecommendationResponse)
+@router.get("/hybrid/{product_asin}", responses={200: {"model": RecommendationResponse}})
 async def get_hybrid_recommendations(
-    product_asin: str,
+    product_asin: AsinPath,
     n: int = Query(6, ge=1, le=20, description="Number of recommendations"),
     cf_weight: float = Query(0.6, ge=0, le=1, description="CF weight (0-1)")
 ):
@@ -163,16 +264,22 @@ async def get_hybrid_recommendations(
     if not recommendation_service.is_ready:
         raise HTTPException(status_code=503, detail="Models not loaded")
     
-    recommendations = recommendation_service.get_hybrid_recommendations(product_asin, n, cf_weight)
+    recommendations = await _cached(
+        "hybrid",
+        recommendation_service.get_hybrid_recommendations,
+        product_asin,
+        n,
+        cf_weight,
+    )
     
     if not recommendations:
         raise HTTPException(status_code=404, detail=f"Product {product_asin} not found")
     
     source = recommendation_service.get_product_details(product_asin)
     
-    return RecommendationResponse(
-        product_asin=product_asin,
-        method="hybrid",
-        source_product=ProductDetails(**source) if source else None,
-        recommendations=[RecommendationItem(**r) for r in recommendations]
-    )
+    return {
+        "product_asin": product_asin,
+        "method": "hybrid",
+        "source_product": source,
+        "recommendations": recommendations
+    }
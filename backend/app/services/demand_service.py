@@ -1,7 +1,13 @@
 """
 Demand Forecasting Service - Provides demand analytics and forecasts
 """
+import hashlib
 import json
+import math
+import os
+import warnings
+from collections import deque
+from functools import wraps
 from pathlib import Path
 from datetime import datetime
 from typing import Optional
@@ -9,11 +15,61 @@ from typing import Optional
 import polars as pl
 import numpy as np
 import joblib
-import pandas as pd
+
+try:
+    import treelite
+    import treelite.sklearn
+    HAS_TREELITE = True
+except ImportError:  # Optional: forecasts fall back to the sklearn model's predict
+    HAS_TREELITE = False
 
 # Paths
 DATASET_PATH = Path(__file__).parent.parent.parent / "ml" / "dataset"
 MODELS_PATH = Path(__file__).parent.parent.parent / "ml" / "models"
+# Parquet copies of the loaded tables, so restarts skip parsing the JSONL files.
+# Bump CACHE_VERSION whenever the tables built by _load_data change.
+CACHE_PATH = DATASET_PATH / ".cache"
+CACHE_VERSION = 2
+CACHE_TABLES = ("weekly_demand", "product_stats", "metadata")
+# treelite's evaluator has less per-call overhead than sklearn but is slower on
+# larger batches; above this many rows predictions go through sklearn
+TREELITE_MAX_ROWS = 16
+# Features computed by _ForecastState.features, in the order it returns them
+FORECAST_FEATURES = ('lag_1', 'lag_2', 'lag_4', 'rolling_mean_4', 'rolling_std_4')
+
+
+def _format_week(year_week: int) -> str:
+    """Format a year*100 + week key as "YYYY-Www"."""
+    return f"{year_week // 100}-W{year_week % 100:02d}"
+
+
+def _mean(values) -> float:
+    """Mean of a short list, without the cost of converting it to a numpy array."""
+    return sum(values) / len(values) if values else 0.0
+
+
+def _std(values) -> float:
+    """Population standard deviation of a short list (same as np.std)."""
+    if not values:
+        return 0.0
+    mean = _mean(values)
+    return math.sqrt(sum((v - mean) ** 2 for v in values) / len(values))
+
+
+def _cached_result(method):
+    """Cache a method's result per arguments until the demand data is reloaded.
+
+    The cached lists/dicts are shared between callers and must not be mutated.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        try:
+            return self._cache[key]
+        except KeyError:
+            result = self._cache[key] = method(self, *args, **kwargs)
+            return result
+    return wrapper
 
 
 class DemandService:
@@ -33,9 +89,16 @@ class DemandService:
         
         self.weekly_demand = None
         self.product_stats = None
+        self._asin_offsets = {}
         self.metadata = {}
+        self._meta_df = None
+        self._cat_df = None
+        self._cache = {}  # Aggregate query results, cleared on every (re)load
+        self.generation = 0  # Bumped on every (re)load so callers can drop stale caches
         self.forecast_model = None
         self.model_info = None
+        self._tree_model = None
+        self._feature_columns = None  # Model column of each FORECAST_FEATURES entry
         self._initialized = True
         self._load_data()
         self._load_forecast_model()
@@ -50,101 +113,278 @@ class DemandService:
             if not reviews_path.exists():
                 print("⚠️ Reviews file not found for demand analysis")
                 return
+            meta_path = DATASET_PATH / "meta_Home_and_Kitchen.jsonl"
+            if not meta_path.exists():
+                meta_path = DATASET_PATH / "meta_Home_and_Kitchen.json"
             
             print("📊 Loading demand data...")
             
-            # Load reviews
-            reviews_raw = pl.read_ndjson(reviews_path, n_rows=100000)
-            
-            # Rename columns to match expected names
-            # The dataset uses: reviewerID, overall, asin, unixReviewTime
-            # We need: user_id, rating, parent_asin, timestamp
-            if 'timestamp' not in reviews_raw.columns and 'unixReviewTime' in reviews_raw.columns:
-                reviews = reviews_raw.rename({
-                    'reviewerID': 'user_id',
-                    'overall': 'rating',
-                    'asin': 'parent_asin',
-                    'unixReviewTime': 'timestamp'
-                }).with_columns([
-                    pl.col('parent_asin').alias('asin')
-                ])
-            else:
-                reviews = reviews_raw
-            
-            # Convert timestamp to datetime
-            # Note: unixReviewTime is in SECONDS, not milliseconds
-            if 'timestamp' in reviews.columns:
-                reviews = reviews.with_columns([
-                    pl.from_epoch(pl.col('timestamp'), time_unit='s').alias('date')
-                ])
+            cache_key = self._cache_key(reviews_path, meta_path)
+            cached = self._read_cache(cache_key)
+            if cached is not None:
+                self.weekly_demand, self.product_stats, meta_table = cached
             else:
-                print("⚠️ No timestamp column found - skipping date conversion")
-                return
-            
-            # Extract date components
-            reviews = reviews.with_columns([
-                pl.col('date').dt.year().alias('year'),
-                pl.col('date').dt.month().alias('month'),
-                pl.col('date').dt.week().alias('week'),
-            ])
+                weekly_plan = self._aggregate_reviews(reviews_path)
+                if weekly_plan is None:
+                    return
+
+                # Calculate product stats on top of the weekly plan; both are collected
+                # together so the shared scan and aggregation run only once
+                stats_plan = (
+                    weekly_plan
+                    # Weeks come sorted by parent_asin, so the sorted group-by
+                    # path applies
+                    .with_columns(pl.col('parent_asin').set_sorted())
+                    .group_by('parent_asin', maintain_order=True)
+                    .agg([
+                        pl.len().alias('num_weeks'),
+                        pl.col('demand').sum().alias('total_demand'),
+                        pl.col('demand').mean().alias('avg_weekly_demand'),
+                        pl.col('demand').std().alias('std_demand'),
+                        pl.col('avg_rating').mean().alias('avg_rating')
+                    ])
+                    .sort('total_demand', descending=True)
+                )
+                self.weekly_demand, self.product_stats = pl.collect_all(
+                    [weekly_plan, stats_plan], engine='streaming'
+                )
+
+                # Load metadata for product names; without a metadata file an empty
+                # table is cached, so a missing cache file is never mistaken for it
+                if meta_path.exists():
+                    meta_table = self._read_metadata(meta_path)
+                else:
+                    meta_table = pl.DataFrame(
+                        schema={
+                            'parent_asin': pl.Categorical,
+                            'title': pl.Utf8,
+                            'price': pl.Null,
+                            'categories': pl.List(pl.Utf8),
+                        }
+                    )
+                self._write_cache(cache_key, meta_table)
             
-            # Create year-week identifier
-            reviews = reviews.with_columns([
-                (pl.col('year').cast(pl.Utf8) + "-W" + 
-                 pl.col('week').cast(pl.Utf8).str.zfill(2)).alias('year_week')
+            # Parquet doesn't keep the sorted flag; restore it so later group-bys on
+            # parent_asin take the sorted path. demand_cum is each product's running
+            # demand total, so totals and half-period means are O(1) lookups.
+            self.weekly_demand = self.weekly_demand.with_columns([
+                pl.col('parent_asin').set_sorted(),
+                pl.col('demand').cast(pl.Int64).cum_sum().over('parent_asin')
+                .alias('demand_cum'),
             ])
+
+            # Metadata as a frame for joins against result rows, and as a dict for
+            # single-product lookups
+            self._meta_df = meta_table
+            if len(meta_table):
+                cols = meta_table.to_dict(as_series=False)
+                self.metadata = {
+                    asin: {'title': title, 'price': price, 'categories': categories}
+                    for asin, title, price, categories in zip(
+                        cols['parent_asin'],
+                        cols['title'],
+                        cols['price'],
+                        cols['categories'],
+                    )
+                }
             
-            # Aggregate to weekly demand per product
-            self.weekly_demand = (
-                reviews
-                .group_by(['parent_asin', 'year_week', 'year', 'week'])
-                .agg([
-                    pl.len().alias('demand'),
-                    pl.col('rating').mean().alias('avg_rating')
-                ])
-                .sort(['parent_asin', 'year_week'])
-            )
-            
-            # Calculate product stats
-            self.product_stats = (
+            # Row range of each product in weekly_demand (sorted by parent_asin), so
+            # per-product lookups slice the frame instead of filtering all of it
+            groups = (
                 self.weekly_demand
-                .group_by('parent_asin')
-                .agg([
-                    pl.len().alias('num_weeks'),
-                    pl.col('demand').sum().alias('total_demand'),
-                    pl.col('demand').mean().alias('avg_weekly_demand'),
-                    pl.col('demand').std().alias('std_demand'),
-                    pl.col('avg_rating').mean().alias('avg_rating')
-                ])
-                .sort('total_demand', descending=True)
+                .group_by('parent_asin', maintain_order=True)
+                .agg(pl.len())
             )
-            
-            # Load metadata for product names
-            # Try both .jsonl and .json extensions
-            meta_path = DATASET_PATH / "meta_Home_and_Kitchen.jsonl"
-            if not meta_path.exists():
-                meta_path = DATASET_PATH / "meta_Home_and_Kitchen.json"
-            if meta_path.exists():
-                meta = pl.read_ndjson(meta_path, n_rows=50000)
-                for row in meta.iter_rows(named=True):
-                    # Handle both 'parent_asin' and 'asin' column names
-                    asin = row.get('parent_asin') or row.get('asin')
-                    if asin:
-                        self.metadata[asin] = {
-                            'title': row.get('title', asin),
-                            'price': row.get('price'),
-                            'categories': row.get('categories', [])
-                        }
-            
+            asins = groups['parent_asin'].to_list()
+            lengths = groups['len'].to_list()
+            ends = groups['len'].cum_sum().to_list()
+            self._asin_offsets = {
+                asin: (end - length, end)
+                for asin, length, end in zip(asins, lengths, ends)
+            }
+
+            # Main (first) category of each product, joined against product_stats
+            # to aggregate demand by category
+            cat_asins = []
+            main_categories = []
+            for asin, meta in self.metadata.items():
+                categories = meta['categories']
+                if categories:
+                    cat_asins.append(asin)
+                    main_categories.append(
+                        categories[0] if isinstance(categories, list) else str(categories)
+                    )
+            self._cat_df = pl.DataFrame(
+                {'parent_asin': cat_asins, 'category': main_categories},
+                schema={'parent_asin': pl.Categorical, 'category': pl.Utf8},
+            )
+
+            self._cache.clear()
+            self.generation += 1
             print(f"✅ Demand data loaded: {len(self.weekly_demand):,} product-weeks")
             
         except Exception as e:
             print(f"⚠️ Error loading demand data: {e}")
     
+    def _aggregate_reviews(self, reviews_path: Path) -> Optional[pl.LazyFrame]:
+        """Build the lazy plan aggregating the reviews file to weekly demand."""
+        # Load reviews lazily: the whole ingest below is one Polars plan, so only
+        # the needed columns are parsed and the date steps fuse into the group-by
+        reviews = pl.scan_ndjson(reviews_path, n_rows=100000)
+        columns = reviews.collect_schema().names()
+
+        # Rename columns to match expected names
+        # The dataset uses: overall, asin, unixReviewTime
+        # We need: rating, parent_asin, timestamp
+        if 'timestamp' not in columns and 'unixReviewTime' in columns:
+            reviews = reviews.rename({
+                'overall': 'rating',
+                'asin': 'parent_asin',
+                'unixReviewTime': 'timestamp'
+            })
+        elif 'timestamp' not in columns:
+            print("⚠️ No timestamp column found - skipping date conversion")
+            return None
+
+        # Convert timestamp to datetime
+        # Note: unixReviewTime is in SECONDS, not milliseconds
+        date = pl.from_epoch(pl.col('timestamp'), time_unit='s')
+
+        return (
+            reviews
+            .select([
+                # Dictionary-encode ASINs so group-bys, sorts and joins work on
+                # 32-bit codes instead of hashing strings
+                pl.col('parent_asin').cast(pl.Categorical),
+                'timestamp',
+                'rating',
+            ])
+            .with_columns([
+                date.dt.year().alias('year'),
+                date.dt.week().alias('week'),
+            ])
+            # Create year-week identifier as an integer key (year * 100 + week),
+            # formatted as "YYYY-Www" only for the rows returned to callers
+            .with_columns([
+                (pl.col('year').cast(pl.Int32) * 100 + pl.col('week'))
+                .cast(pl.Int32).alias('year_week')
+            ])
+            .group_by(['parent_asin', 'year_week', 'year', 'week'])
+            .agg([
+                pl.len().alias('demand'),
+                pl.col('rating').mean().alias('avg_rating')
+            ])
+            .sort(['parent_asin', 'year_week'])
+        )
+
+    def _read_metadata(self, meta_path: Path) -> pl.DataFrame:
+        """Read product titles, prices and categories, one row per ASIN."""
+        # Scan lazily so only the needed fields are parsed; descriptions, features
+        # and image lists are skipped
+        meta = pl.scan_ndjson(meta_path, n_rows=50000)
+        columns = meta.collect_schema().names()
+        meta_df = meta.select([
+            c for c in ('parent_asin', 'asin', 'title', 'price', 'categories')
+            if c in columns
+        ]).collect(engine='streaming')
+        # Pull the needed columns out as Python lists once instead of
+        # building a named row per product
+        cols = meta_df.to_dict(as_series=False)
+        missing = [None] * len(meta_df)
+        has_title = 'title' in cols
+        has_categories = 'categories' in cols
+        metadata = {}
+        for parent_asin, alt_asin, title, price, categories in zip(
+            cols.get('parent_asin', missing),
+            cols.get('asin', missing),
+            cols.get('title', missing),
+            cols.get('price', missing),
+            cols.get('categories', missing),
+        ):
+            # Handle both 'parent_asin' and 'asin' column names
+            asin = parent_asin or alt_asin
+            if asin:
+                metadata[asin] = (
+                    title if has_title else asin,
+                    price,
+                    categories if has_categories else [],
+                )
+
+        rows = list(metadata.values())
+        return pl.DataFrame(
+            {
+                'parent_asin': list(metadata),
+                'title': [row[0] for row in rows],
+                'price': [row[1] for row in rows],
+                'categories': [row[2] for row in rows],
+            },
+            schema_overrides={'parent_asin': pl.Categorical, 'title': pl.Utf8},
+            strict=False,
+        )
+
+    def _cache_key(self, reviews_path: Path, meta_path: Path) -> str:
+        """Key the Parquet cache on the source files' mtimes and sizes."""
+        parts = [str(CACHE_VERSION)]
+        for path in (reviews_path, meta_path):
+            if path.exists():
+                stat = path.stat()
+                parts.append(f"{path.name}:{stat.st_mtime_ns}:{stat.st_size}")
+        return hashlib.sha1("|".join(parts).encode()).hexdigest()[:8]
+
+    def _read_cache(self, key: str) -> Optional[tuple]:
+        """Read weekly demand, product stats and metadata cached for key, if any.
+
+        Any missing table is a cache miss, so the tables are rebuilt together.
+        """
+        paths = [CACHE_PATH / f"{name}_{key}.parquet" for name in CACHE_TABLES]
+        if not all(path.exists() for path in paths):
+            return None
+        try:
+            weekly_demand, product_stats, meta_table = (
+                pl.read_parquet(path) for path in paths
+            )
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable demand cache: {e}")
+            return None
+        return weekly_demand, product_stats, meta_table
+
+    def _write_cache(self, key: str, meta_table: pl.DataFrame):
+        """Write the loaded tables to Parquet for the next start (best effort).
+
+        Workers may start together, so each file is written under a temporary
+        name and renamed into place; readers never see a partial file.
+        """
+        tables = [self.weekly_demand, self.product_stats, meta_table]
+        try:
+            CACHE_PATH.mkdir(exist_ok=True)
+            for name, table in zip(CACHE_TABLES, tables):
+                path = CACHE_PATH / f"{name}_{key}.parquet"
+                tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+                try:
+                    table.write_parquet(tmp_path, compression='zstd')
+                    os.replace(tmp_path, path)
+                finally:
+                    tmp_path.unlink(missing_ok=True)
+            # Drop caches built from older versions of the source files
+            for stale in CACHE_PATH.glob("*.parquet"):
+                if not stale.name.endswith(f"_{key}.parquet"):
+                    stale.unlink(missing_ok=True)
+        except Exception as e:
+            print(f"⚠️ Could not write demand cache: {e}")
+
     @property
     def is_ready(self) -> bool:
         return self.weekly_demand is not None
     
+    def _product_weeks(self, asin: str) -> Optional[pl.DataFrame]:
+        """Get the weekly demand rows of a product, sorted by year_week."""
+        offsets = self._asin_offsets.get(asin)
+        if offsets is None:
+            return None
+        start, end = offsets
+        return self.weekly_demand.slice(start, end - start)
+
+    @_cached_result
     def get_stats(self) -> dict:
         """Get overall demand statistics."""
         if not self.is_ready:
@@ -152,39 +392,57 @@ class DemandService:
         
         # Overall stats
         total_products = self.product_stats['parent_asin'].n_unique()
-        total_weeks = self.weekly_demand['year_week'].n_unique()
-        total_demand = int(self.weekly_demand['demand'].sum())
         
-        # Time range
-        weeks = sorted(self.weekly_demand['year_week'].unique().to_list())
+        # Week count, total demand and time range in one pass over weekly_demand
+        total_weeks, total_demand, first_week, last_week = self.weekly_demand.select([
+            pl.col('year_week').n_unique(),
+            pl.col('demand').sum(),
+            pl.col('year_week').min().alias('first_week'),
+            pl.col('year_week').max().alias('last_week'),
+        ]).row(0)
         
         return {
             "status": "ready",
             "total_products": total_products,
             "total_weeks": total_weeks,
-            "total_demand": total_demand,
+            "total_demand": int(total_demand),
             "time_range": {
-                "start": weeks[0] if weeks else None,
-                "end": weeks[-1] if weeks else None
+                "start": _format_week(first_week) if first_week is not None else None,
+                "end": _format_week(last_week) if last_week is not None else None
             },
             "assumption": "Review count used as proxy for demand"
         }
     
+    @_cached_result
     def get_top_products(self, limit: int = 20) -> list[dict]:
         """Get top products by demand."""
         if not self.is_ready:
             return []
         
-        top = self.product_stats.head(limit)
+        top = (
+            self.product_stats
+            .head(limit)
+            .join(
+                self._meta_df.select(['parent_asin', 'title']),
+                on='parent_asin',
+                how='left',
+                maintain_order='left',
+            )
+            # Missing titles fall back to the ASIN; long ones are cut to 60 characters
+            .with_columns(pl.col('title').fill_null(pl.col('parent_asin').cast(pl.Utf8)))
+            .with_columns(
+                pl.when(pl.col('title').str.len_chars() > 60)
+                .then(pl.col('title').str.slice(0, 60) + pl.lit("..."))
+                .otherwise(pl.col('title'))
+                .alias('title')
+            )
+        )
         
         results = []
         for row in top.iter_rows(named=True):
-            asin = row['parent_asin']
-            meta = self.metadata.get(asin, {})
-            
             results.append({
-                "asin": asin,
-                "title": meta.get('title', asin)[:60] + "..." if len(meta.get('title', asin)) > 60 else meta.get('title', asin),
+                "asin": row['parent_asin'],
+                "title": row['title'],
                 "total_demand": int(row['total_demand']),
                 "avg_weekly_demand": round(row['avg_weekly_demand'], 2),
                 "num_weeks": int(row['num_weeks']),
@@ -198,34 +456,30 @@ class DemandService:
         if not self.is_ready:
             return None
         
-        product_data = (
-            self.weekly_demand
-            .filter(pl.col('parent_asin') == asin)
-            .sort('year_week')
-        )
+        product_data = self._product_weeks(asin)
         
-        if len(product_data) == 0:
+        if product_data is None:
             return None
         
         meta = self.metadata.get(asin, {})
         
-        # Get time series - preserve precision for small values
-        time_series = []
-        for row in product_data.iter_rows(named=True):
-            # Keep as float to preserve precision for small demand values
-            demand_value = float(row['demand'])
-            time_series.append({
-                "week": row['year_week'],
-                "demand": round(demand_value, 2),  # Round to 2 decimals instead of int
-                "rating": round(row['avg_rating'], 2) if row['avg_rating'] else None
-            })
+        # Columnar time series: one list per field instead of one dict per week
+        weeks = [_format_week(yw) for yw in product_data['year_week'].to_list()]
+        demands = product_data['demand'].to_list()
+        ratings = [
+            round(r, 2) if r else None
+            for r in product_data['avg_rating'].to_list()
+        ]
         
-        # Calculate trend (simple: compare first half vs second half)
-        demands = [t['demand'] for t in time_series]
-        mid = len(demands) // 2
+        # Calculate trend (simple: compare first half vs second half), using the
+        # running totals instead of summing each half
+        demand_cum = product_data['demand_cum']
+        total_demand = demand_cum[-1]
+        n = len(demands)
+        mid = n // 2
         if mid > 0:
-            first_half_avg = np.mean(demands[:mid])
-            second_half_avg = np.mean(demands[mid:])
+            first_half_avg = demand_cum[mid - 1] / mid
+            second_half_avg = (total_demand - demand_cum[mid - 1]) / (n - mid)
             if second_half_avg > first_half_avg * 1.1:
                 trend = "increasing"
             elif second_half_avg < first_half_avg * 0.9:
@@ -238,14 +492,19 @@ class DemandService:
         return {
             "asin": asin,
             "title": meta.get('title', asin),
-            "total_demand": int(sum(demands)),
-            "avg_demand": round(np.mean(demands), 2),
+            "total_demand": int(total_demand),
+            "avg_demand": round(total_demand / n, 2),
             "max_demand": int(max(demands)),
             "min_demand": int(min(demands)),
             "trend": trend,
-            "time_series": time_series
+            "time_series": {
+                "weeks": weeks,
+                "demand": demands,
+                "rating": ratings
+            }
         }
     
+    @_cached_result
     def get_overall_trend(self) -> list[dict]:
         """Get overall demand trend (all products aggregated by week)."""
         if not self.is_ready:
@@ -264,48 +523,40 @@ class DemandService:
         results = []
         for row in overall.iter_rows(named=True):
             results.append({
-                "week": row['year_week'],
+                "week": _format_week(row['year_week']),
                 "total_demand": int(row['total_demand']),
                 "active_products": int(row['active_products'])
             })
         
         return results
     
+    @_cached_result
     def get_category_demand(self) -> list[dict]:
         """Get demand by category."""
         if not self.is_ready or not self.metadata:
             return []
         
-        # Aggregate demand by category
-        category_demand = {}
-        
-        for row in self.product_stats.iter_rows(named=True):
-            asin = row['parent_asin']
-            meta = self.metadata.get(asin, {})
-            categories = meta.get('categories', [])
-            
-            if categories and len(categories) > 0:
-                # Use first category (main category)
-                cat = categories[0] if isinstance(categories, list) else str(categories)
-                if cat not in category_demand:
-                    category_demand[cat] = {"demand": 0, "products": 0}
-                category_demand[cat]["demand"] += row['total_demand']
-                category_demand[cat]["products"] += 1
-        
-        # Sort by demand
-        sorted_cats = sorted(
-            category_demand.items(), 
-            key=lambda x: x[1]["demand"], 
-            reverse=True
-        )[:15]  # Top 15 categories
+        # Aggregate demand by category, top 15 categories first
+        top_categories = (
+            self.product_stats
+            .join(self._cat_df, on='parent_asin')
+            .group_by('category')
+            .agg([
+                pl.col('total_demand').sum(),
+                pl.len().alias('num_products')
+            ])
+            # Ties are broken by category name so the cut-off is deterministic
+            .top_k(15, by=['total_demand', 'category'], reverse=[False, True])
+            .sort(['total_demand', 'category'], descending=[True, False])
+        )
         
         return [
             {
-                "category": cat,
-                "total_demand": int(data["demand"]),
-                "num_products": data["products"]
+                "category": row['category'],
+                "total_demand": int(row['total_demand']),
+                "num_products": int(row['num_products'])
             }
-            for cat, data in sorted_cats
+            for row in top_categories.iter_rows(named=True)
         ]
     
     def _load_forecast_model(self):
@@ -318,158 +569,227 @@ class DemandService:
                 self.forecast_model = joblib.load(model_path)
                 with open(info_path, 'r') as f:
                     self.model_info = json.load(f)
+                feature_cols = self.model_info.get('features', list(FORECAST_FEATURES))
+                if sorted(feature_cols) == sorted(FORECAST_FEATURES):
+                    self._feature_columns = [
+                        feature_cols.index(name) for name in FORECAST_FEATURES
+                    ]
+                else:
+                    print(
+                        f"⚠️ Forecast model features {feature_cols} do not match "
+                        f"{list(FORECAST_FEATURES)} - forecasts will use the fallback"
+                    )
+                if HAS_TREELITE:
+                    try:
+                        self._tree_model = treelite.sklearn.import_model(
+                            self.forecast_model
+                        )
+                    except Exception as e:
+                        print(f"⚠️ Could not convert forecast model for treelite: {e}")
                 print("✅ Forecast model loaded successfully")
             else:
                 print("⚠️ Forecast model not found - forecasts will be unavailable")
         except Exception as e:
             print(f"⚠️ Error loading forecast model: {e}")
     
+    def _predict(self, features: np.ndarray) -> np.ndarray:
+        """Predict one value per feature row with the forecast model."""
+        if self._tree_model is not None and len(features) <= TREELITE_MAX_ROWS:
+            return treelite.gtil.predict(self._tree_model, features).reshape(-1)
+        # The model was fitted on a DataFrame but is fed a plain feature array, laid
+        # out in FORECAST_FEATURES order (checked at load)
+        with warnings.catch_warnings():
+            warnings.filterwarnings(
+                "ignore",
+                message="X does not have valid feature names",
+                category=UserWarning,
+            )
+            return self.forecast_model.predict(features)
+
     def generate_forecast(self, asin: str, weeks: int = 8) -> Optional[dict]:
         """Generate demand forecast for a product."""
+        return self.generate_forecasts_batch([asin], weeks).get(asin)
+
+    def generate_forecasts_batch(
+        self, asins: list[str], weeks: int = 8
+    ) -> dict[str, dict]:
+        """Generate demand forecasts for several products.
+
+        Every forecast step predicts all products with a single model call.
+        Products with less than 10 weeks of history are left out.
+        """
         if not self.is_ready or not self.forecast_model:
-            return None
+            return {}
         
         # Get historical data
-        product_data = (
-            self.weekly_demand
-            .filter(pl.col('parent_asin') == asin)
-            .sort('year_week')
-        )
-        
-        if len(product_data) < 10:  # Need at least 10 weeks
-            return None
-        
-        meta = self.metadata.get(asin, {})
+        products = []
+        for asin in dict.fromkeys(asins):
+            product_data = self._product_weeks(asin)
+            # Need at least 10 weeks
+            if product_data is not None and len(product_data) >= 10:
+                products.append((asin, product_data))
+        if not products:
+            return {}
         
-        # Convert to pandas for model
-        df = product_data.to_pandas()
-        df = df.sort_values('year_week')
-        
-        # Prepare features (same as training)
-        feature_cols = self.model_info.get('features', ['lag_1', 'lag_2', 'lag_4', 'rolling_mean_4', 'rolling_std_4'])
-        
-        # Get last N weeks for feature engineering
-        demands = df['demand'].values.tolist()
+        # Feature matrix reused by every step, one row per product in the order the
+        # model expects (checked against FORECAST_FEATURES when the model is loaded)
+        feature_columns = self._feature_columns
+        features = np.empty((len(products), len(FORECAST_FEATURES)), dtype=np.float64)
         
         # Generate forecasts using rolling window approach
         # This mimics the notebook's approach: each prediction feeds into the next
-        forecasts = []
-        historical = [float(d) for d in demands]  # Ensure all floats
+        states = [
+            _ForecastState(product_data['demand'].to_list())
+            for _, product_data in products
+        ]
+        for i in range(weeks):
+            # Predict using the model
+            preds: list[Optional[float]] = [None] * len(states)
+            if feature_columns is not None:
+                try:
+                    for row, state in enumerate(states):
+                        # Fill the feature vector exactly as the model expects
+                        features[row, feature_columns] = state.features()
+
+                    preds = self._predict(features).tolist()
+                except Exception:
+                    preds = [None] * len(states)
+
+            for state, pred in zip(states, preds):
+                state.advance(i, pred)
+
+        model_type = self.model_info.get('model_type', 'GradientBoostingRegressor')
+        model_mae = self.model_info.get('metrics', {}).get('MAE', 0)
+        results = {}
+        for (asin, product_data), state in zip(products, states):
+            # Get historical data for comparison - preserve precision
+            tail = product_data.tail(12)
+            historical_data = [
+                {
+                    "week": _format_week(year_week),
+                    # Round to 2 decimals for consistency
+                    "demand": round(float(demand), 2),
+                    "is_forecast": False
+                }
+                for year_week, demand in zip(
+                    tail['year_week'].to_list(), tail['demand'].to_list()
+                )
+            ]
+
+            results[asin] = {
+                "asin": asin,
+                "title": self.metadata.get(asin, {}).get('title', asin),
+                "model_type": model_type,
+                "model_mae": model_mae,
+                "forecast_weeks": weeks,
+                "historical": historical_data,
+                "forecast": state.forecasts,
+                "combined": historical_data + state.forecasts
+            }
         
+        return results
+
+
+class _ForecastState:
+    """Rolling forecast state of one product, advanced one week per step."""
+
+    def __init__(self, demands: list):
+        self.forecasts: list[dict] = []
+        historical = [float(d) for d in demands]  # Ensure all floats
+
         # Calculate historical variation pattern to inform forecasts
         if len(historical) >= 8:
             recent_values = historical[-8:]
-            historical_std = float(np.std(recent_values))
-            historical_mean = float(np.mean(recent_values))
+            self.historical_std = _std(recent_values)
             # Calculate trend (simple difference between last 4 and previous 4)
-            trend = (np.mean(historical[-4:]) - np.mean(historical[-8:-4])) if len(historical) >= 8 else 0
+            self.trend = _mean(historical[-4:]) - _mean(historical[-8:-4])
         else:
-            historical_std = 0.2
-            historical_mean = float(np.mean(historical)) if historical else 1.0
-            trend = 0
+            self.historical_std = 0.2
+            self.trend = 0
         
-        for i in range(weeks):
-            # Need at least 4 historical points for lag_4 and rolling stats
-            if len(historical) < 4:
-                # Fallback: use average with small variation
-                avg_demand = float(np.mean(historical)) if historical else 1.0
-                # Add small variation to prevent identical values
-                pred = avg_demand + (i % 3 - 1) * 0.1
-                pred = max(0.1, pred)
-            else:
-                # Extract the most recent values for features
-                # These change each iteration as we add new predictions
-                lag_1 = historical[-1]  # Most recent value
-                lag_2 = historical[-2]  # 2 steps back
-                lag_4 = historical[-4]  # 4 steps back
-                
-                # Rolling statistics from last 4 values
-                last_4 = historical[-4:]
-                rolling_mean_4 = float(np.mean(last_4))
-                rolling_std_4 = float(np.std(last_4))
-                
-                # Handle edge case: if std is too small, use a minimum based on mean
-                # This ensures features have enough variation
-                if rolling_std_4 < 0.05:
-                    rolling_std_4 = max(0.1, rolling_mean_4 * 0.15)
-                
-                # Create feature vector exactly as the model expects
-                features = pd.DataFrame([{
-                    'lag_1': lag_1,
-                    'lag_2': lag_2,
-                    'lag_4': lag_4,
-                    'rolling_mean_4': rolling_mean_4,
-                    'rolling_std_4': rolling_std_4
-                }])
+        # Last 4 values as a fixed-size ring buffer, which is all the lag and
+        # rolling features need; their sum and sum of squares are updated in O(1)
+        # as each prediction is appended instead of recomputing mean/std every step
+        self.window = deque(historical[-4:], maxlen=4)
+        self.rolling_sum = sum(self.window)
+        self.rolling_sq_sum = sum(v * v for v in self.window)
+
+    def features(self) -> tuple:
+        """Model features for the next step (needs at least 4 historical points)."""
+        # Extract the most recent values for features
+        # These change each iteration as we add new predictions
+        window = self.window
+        lag_1 = window[-1]  # Most recent value
+        lag_2 = window[-2]  # 2 steps back
+        lag_4 = window[0]  # 4 steps back
+
+        # Rolling statistics from last 4 values (population std, as np.std)
+        rolling_mean_4 = self.rolling_sum / 4
+        rolling_std_4 = math.sqrt(max(0.0, self.rolling_sq_sum / 4 - rolling_mean_4 ** 2))
+
+        # Handle edge case: if std is too small, use a minimum based on mean
+        # This ensures features have enough variation
+        if rolling_std_4 < 0.05:
+            rolling_std_4 = max(0.1, rolling_mean_4 * 0.15)
+
+        return lag_1, lag_2, lag_4, rolling_mean_4, rolling_std_4
+
+    def advance(self, i: int, pred: Optional[float]):
+        """Record step i from the model prediction (None if the model failed)."""
+        rolling_mean_4 = self.rolling_sum / 4
+        historical_std = self.historical_std
+        trend = self.trend
+
+        if pred is None:
+            # Fallback: use rolling mean with trend and variation
+            variation = historical_std * 0.3 * (1 if (i % 2 == 0) else -1)
+            pred = rolling_mean_4 + variation + trend * (i + 1) * 0.1
+            pred = max(0.1, pred)
+        else:
+            pred = max(0.1, pred)  # Ensure positive (min 0.1 to avoid zeros)
+
+            # Always add some variation to prevent identical predictions
+            # This ensures the forecast shows realistic ups and downs
+            if i > 0:
+                last_pred = self.forecasts[-1]['demand']
                 
-                # Predict using the model
-                try:
-                    pred = float(self.forecast_model.predict(features[feature_cols])[0])
-                    pred = max(0.1, pred)  # Ensure positive (min 0.1 to avoid zeros)
-                    
-                    # Always add some variation to prevent identical predictions
-                    # This ensures the forecast shows realistic ups and downs
-                    if i > 0:
-                        last_pred = forecasts[-1]['demand']
-                        
-                        # If prediction is too similar to last one, add variation
-                        if abs(pred - last_pred) < 0.15:
-                            # Create variation pattern based on historical std and trend
-                            # Use alternating pattern with increasing magnitude
-                            direction = 1 if (i % 2 == 0) else -1
-                            base_variation = max(historical_std * 0.5, 0.2)  # At least 0.2 variation
-                            variation = base_variation * direction * (1 + i * 0.15)
-                            trend_component = trend * (i + 1) * 0.15
-                            pred = rolling_mean_4 + variation + trend_component
-                            pred = max(0.1, pred)
-                        # Even if different, ensure minimum variation between consecutive predictions
-                        elif abs(pred - last_pred) < 0.05:
-                            # Force minimum variation
-                            pred = last_pred + (0.15 if (i % 2 == 0) else -0.15)
-                            pred = max(0.1, pred)
-                    
-                except Exception as e:
-                    # Fallback: use rolling mean with trend and variation
-                    variation = historical_std * 0.3 * (1 if (i % 2 == 0) else -1)
-                    pred = rolling_mean_4 + variation + trend * (i + 1) * 0.1
+                # If prediction is too similar to last one, add variation
+                if abs(pred - last_pred) < 0.15:
+                    # Create variation pattern based on historical std and trend
+                    # Use alternating pattern with increasing magnitude
+                    direction = 1 if (i % 2 == 0) else -1
+                    # At least 0.2 variation
+                    base_variation = max(historical_std * 0.5, 0.2)
+                    variation = base_variation * direction * (1 + i * 0.15)
+                    trend_component = trend * (i + 1) * 0.15
+                    pred = rolling_mean_4 + variation + trend_component
+                    pred = max(0.1, pred)
+                # Even if different, ensure minimum variation between consecutive
+                # predictions
+                elif abs(pred - last_pred) < 0.05:
+                    # Force minimum variation
+                    pred = last_pred + (0.15 if (i % 2 == 0) else -0.15)
                     pred = max(0.1, pred)
-            
-            # Store forecast with precision (round for display, but keep full precision for calculations)
-            forecast_value = round(pred, 2)
-            forecasts.append({
-                "week": f"Forecast-{i+1}",
-                "demand": forecast_value,
-                "is_forecast": True
-            })
-            
-            # CRITICAL: Add the FULL PRECISION prediction to history for next iteration
-            # This ensures features change properly between steps, creating variation
-            historical.append(float(pred))
-            
-            # Keep enough history for lag_4 and rolling stats (keep last 20 for safety)
-            if len(historical) > 20:
-                historical = historical[-20:]
-        
-        # Get historical data for comparison - preserve precision
-        historical_data = []
-        for _, row in df.tail(12).iterrows():
-            demand_value = float(row['demand'])
-            historical_data.append({
-                "week": row['year_week'],
-                "demand": round(demand_value, 2),  # Round to 2 decimals for consistency
-                "is_forecast": False
-            })
         
-        return {
-            "asin": asin,
-            "title": meta.get('title', asin),
-            "model_type": self.model_info.get('model_type', 'GradientBoostingRegressor'),
-            "model_mae": self.model_info.get('metrics', {}).get('MAE', 0),
-            "forecast_weeks": weeks,
-            "historical": historical_data,
-            "forecast": forecasts,
-            "combined": historical_data + forecasts
-        }
+        # Store forecast with precision (round for display, but keep full precision
+        # for calculations)
+        self.forecasts.append({
+            "week": f"Forecast-{i+1}",
+            "demand": round(pred, 2),
+            "is_forecast": True
+        })
+
+        # CRITICAL: Add the FULL PRECISION prediction to history for next iteration
+        # This ensures features change properly between steps, creating variation
+        pred = float(pred)
+        if len(self.window) == 4:
+            oldest = self.window[0]
+            self.rolling_sum += pred - oldest
+            self.rolling_sq_sum += pred * pred - oldest * oldest
+        else:
+            self.rolling_sum += pred
+            self.rolling_sq_sum += pred * pred
+        self.window.append(pred)
 
 
 # Global instance
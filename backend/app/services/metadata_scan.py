@@ -0,0 +1,67 @@
+"""
+Metadata Scan - Worker side of the parallel product metadata scan
+
+The recommendation service parses large metadata files in spawned worker
+processes, which import only this module; it has no import-time side effects.
+"""
+import mmap
+from pathlib import Path
+
+import orjson
+
+# Fields kept from each metadata record
+METADATA_COLUMNS = [
+    'parent_asin', 'asin', 'title', 'description', 'features', 'imageURL',
+    'imageURLHighRes', 'images', 'price', 'average_rating', 'rating_number',
+    'store', 'categories',
+]
+
+
+def metadata_chunks(
+    meta_path: Path, max_rows: int, n_chunks: int
+) -> list[tuple[int, int]]:
+    """Split the first max_rows lines of meta_path into byte ranges on line ends."""
+    with open(meta_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            end = 0
+            for _ in range(max_rows):
+                newline = mm.find(b'\n', end)
+                if newline == -1:
+                    end = len(mm)
+                    break
+                end = newline + 1
+
+            bounds = [0]
+            for i in range(1, n_chunks):
+                newline = mm.find(b'\n', max(end * i // n_chunks, bounds[-1]), end)
+                if newline == -1:
+                    break
+                bounds.append(newline + 1)
+            bounds.append(end)
+    return [(start, stop) for start, stop in zip(bounds, bounds[1:]) if start < stop]
+
+
+_model_products: frozenset[str] = frozenset()  # Set in each worker by init_worker
+
+
+def init_worker(model_products: frozenset[str]):
+    """Pool initializer: receive the model ASINs once per worker process."""
+    global _model_products
+    _model_products = model_products
+
+
+def scan_chunk(meta_path: Path, start: int, stop: int) -> dict[str, dict]:
+    """Raw records of the model products in one byte range, first occurrence wins."""
+    found = {}
+    with open(meta_path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            chunk = mm[start:stop]
+    for line in chunk.split(b'\n'):
+        if not line.strip():
+            continue
+        row = orjson.loads(line)
+        # Handle both 'parent_asin' and 'asin' column names
+        asin = row.get('parent_asin') or row.get('asin')
+        if asin and asin in _model_products and asin not in found:
+            found[asin] = {c: row.get(c) for c in METADATA_COLUMNS}
+    return found
@@ -0,0 +1,90 @@
+"""
+Model Files - Loads and converts the sparse model matrices in ml/models
+
+Importing this module has no side effects, so app.convert_models can use it
+without loading the recommendation service.
+"""
+from pathlib import Path
+from typing import Optional
+
+import joblib
+import numpy as np
+from scipy.sparse import load_npz
+from sklearn.preprocessing import normalize
+
+# Paths
+ML_MODELS_PATH = Path(__file__).parent.parent.parent / "ml" / "models"
+# Stored in every converted matrix file; bump it whenever the prepare functions
+# below change so older conversions are ignored
+SPARSE_MATRIX_VERSION = 1
+
+
+def prepare_item_user_matrix(matrix):
+    """Ready the item-user matrix for collaborative lookups."""
+    # Stored as CSC; CSR makes the per-product row lookups cheap. Rows are
+    # L2-normalized up front since the cosine KNN ignores their scale.
+    return normalize(matrix.tocsr(), norm='l2', copy=False)
+
+
+def prepare_tfidf_matrix(matrix):
+    """Ready the TF-IDF matrix for content similarities."""
+    # L2-normalize rows once so cosine similarity is a plain sparse dot.
+    # float32 halves the bytes each product streams (scipy.sparse has
+    # no float16 support).
+    return normalize(matrix.tocsr().astype(np.float32), norm='l2', copy=False)
+
+
+# Sparse model matrices, by file name stem, and how each is prepared after loading
+SPARSE_MATRICES = {
+    "item_user_matrix": prepare_item_user_matrix,
+    "tfidf_matrix": prepare_tfidf_matrix,
+}
+
+
+def _conversion_key(npz_path: Path) -> tuple[int, int, int]:
+    """Key a converted matrix on the format version and the source file's stat."""
+    stat = npz_path.stat()
+    return (SPARSE_MATRIX_VERSION, stat.st_size, stat.st_mtime_ns)
+
+
+def convert_sparse_matrix(name: str) -> Optional[Path]:
+    """Write <name>.npz, prepared, as a memory-mappable <name>.joblib.
+
+    Returns the written path, or None if there is no <name>.npz.
+    """
+    npz_path = ML_MODELS_PATH / f"{name}.npz"
+    if not npz_path.exists():
+        return None
+    out_path = ML_MODELS_PATH / f"{name}.joblib"
+    joblib.dump(
+        {
+            "key": _conversion_key(npz_path),
+            "matrix": SPARSE_MATRICES[name](load_npz(npz_path)),
+        },
+        out_path,
+    )
+    return out_path
+
+
+def load_sparse_matrix(name: str):
+    """Load a sparse model matrix, memory-mapped when a converted copy exists.
+
+    `python -m app.convert_models` writes prepared copies as <name>.joblib; those
+    are used read-only when converted from the current <name>.npz by this
+    SPARSE_MATRIX_VERSION, otherwise the .npz is loaded and prepared in memory.
+    """
+    npz_path = ML_MODELS_PATH / f"{name}.npz"
+    mmap_path = ML_MODELS_PATH / f"{name}.joblib"
+    if not npz_path.exists():
+        return None
+    if mmap_path.exists():
+        try:
+            converted = joblib.load(mmap_path, mmap_mode='r')
+        except Exception as e:
+            print(f"⚠️ Could not read {mmap_path.name}: {e}")
+            converted = None
+        key = _conversion_key(npz_path)
+        if isinstance(converted, dict) and converted.get("key") == key:
+            return converted["matrix"]
+        print(f"⚠️ {mmap_path.name} is out of date - run python -m app.convert_models")
+    return SPARSE_MATRICES[name](load_npz(npz_path))
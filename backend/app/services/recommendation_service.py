@@ -1,18 +1,51 @@
 """
 Recommendation Service - Loads ML models and provides recommendations with product metadata
 """
-import json
+import hashlib
+import multiprocessing
+import os
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import cache, partial
+from itertools import islice
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional, Sequence
 
 import joblib
-import polars as pl
-from scipy.sparse import load_npz
-from sklearn.metrics.pairwise import cosine_similarity
+import numpy as np
+import orjson
+
+from ..config.config import settings
+from .metadata_scan import METADATA_COLUMNS, init_worker, metadata_chunks, scan_chunk
+from .model_files import ML_MODELS_PATH, load_sparse_matrix
+
+try:
+    import simsimd
+    HAS_SIMSIMD = True
+except ImportError:  # Optional: similarities always use the sparse TF-IDF product
+    HAS_SIMSIMD = False
 
 # Paths
-ML_MODELS_PATH = Path(__file__).parent.parent.parent / "ml" / "models"
 DATASET_PATH = Path(__file__).parent.parent.parent / "ml" / "dataset"
+# SimSIMD over a dense float32 copy of the TF-IDF matrix costs about the same at
+# any density, while the sparse product grows with it; on a 5000x2000 matrix
+# single queries broke even near 5% density and batches of 10 near 15%. Sparser
+# or bigger matrices only use the sparse product.
+TFIDF_DENSE_MIN_DENSITY = 0.1
+TFIDF_DENSE_MAX_BYTES = 256 * 1024 * 1024
+# Pickled product metadata index, so restarts skip scanning the JSONL file.
+# Bump METADATA_CACHE_VERSION whenever the records built from it change.
+CACHE_PATH = DATASET_PATH / ".cache"
+METADATA_CACHE_VERSION = 1
+# Title search indexes every character n-gram of this length; queries are at
+# least this long (see the /search route)
+SEARCH_NGRAM = 2
+# Metadata lines scanned for model products
+METADATA_MAX_ROWS = 500_000
+# With METADATA_SCAN_WORKERS set, metadata files at least this big are parsed in
+# chunks by a pool of worker processes (orjson holds the GIL, so threads wouldn't
+# parse in parallel)
+METADATA_PARALLEL_MIN_BYTES = 32 * 1024 * 1024
 
 
 def _parse_price(price_value) -> Optional[float]:
@@ -36,61 +69,98 @@ def _parse_price(price_value) -> Optional[float]:
     return None
 
 
+def _dense_tfidf_copy(matrix) -> Optional[np.ndarray]:
+    """Dense float32 copy of the TF-IDF matrix for SimSIMD, if it is worth keeping."""
+    n_rows, n_cols = matrix.shape
+    if not HAS_SIMSIMD or not n_rows * n_cols:
+        return None
+    if (
+        matrix.nnz < TFIDF_DENSE_MIN_DENSITY * n_rows * n_cols
+        or n_rows * n_cols * 4 > TFIDF_DENSE_MAX_BYTES
+    ):
+        return None
+    # Held in memory even when the sparse matrix is memory-mapped
+    return matrix.toarray()
+
+
+def _empty_rows(matrix) -> np.ndarray:
+    """Indices of the rows of a CSR matrix without stored values."""
+    return np.flatnonzero(np.diff(matrix.indptr) == 0)
+
+
+def _index_to_list(idx_to_asin: dict[str, str]) -> list[str]:
+    """Turn a JSON {"<index>": asin} mapping into a list indexed by int position."""
+    asins = [""] * (max(map(int, idx_to_asin), default=-1) + 1)
+    for idx, asin in idx_to_asin.items():
+        asins[int(idx)] = asin
+    return asins
+
+
+def _iter_metadata_rows(meta_path: Path, max_rows: int) -> Iterator[dict]:
+    """Yield the first max_rows records of an NDJSON metadata file as dicts."""
+    with open(meta_path, 'rb') as f:
+        for line in islice(f, max_rows):
+            if line.strip():
+                yield orjson.loads(line)
+
+
 class RecommendationService:
-    """Service to handle product recommendations using pre-trained models."""
+    """Service to handle product recommendations using pre-trained models.
     
-    _instance = None
-    
-    def __new__(cls):
-        """Singleton pattern to avoid reloading models."""
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._instance._initialized = False
-        return cls._instance
+    Use get_recommendation_service() rather than constructing it directly, so the
+    models are only loaded once.
+    """
     
     def __init__(self):
-        if self._initialized:
-            return
-        
-        self.knn_model = None
         self.tfidf_vectorizer = None
         self.item_user_matrix = None
         self.tfidf_matrix = None
+        self.tfidf_dense: Optional[np.ndarray] = None  # Dense copy for SimSIMD
+        self._tfidf_empty_rows = np.empty(0, dtype=np.intp)  # All-zero TF-IDF rows
         self.mappings = None
+        self._idx_to_product: list[str] = []  # KNN row index -> ASIN
+        self._cb_idx_to_product: list[str] = []  # TF-IDF row index -> ASIN
         self.product_metadata = {}  # Cache for product details
-        self._initialized = True
+        self._normalized: dict[str, dict] = {}  # Product details by ASIN
+        # Placeholder details for model products
+        self._details_cache: dict[str, dict] = {}
+        self._with_image_set: set[str] = set()  # ASINs whose details have an image
+        # Model products with images, in model order
+        self._available_asins: list[str] = []
+        self._search_titles: list[tuple[str, str]] = []  # (asin, lowercased title)
+        self._title_index: dict[str, set[int]] = {}  # n-gram -> _search_titles positions
+        self.generation = 0  # Bumped on every (re)load so callers can drop stale caches
         self._load_models()
     
     def _load_models(self):
         """Load all ML models from disk."""
         try:
-            # Load KNN model
-            knn_path = ML_MODELS_PATH / "knn_recommender.joblib"
-            if knn_path.exists():
-                self.knn_model = joblib.load(knn_path)
-            
             # Load TF-IDF vectorizer
             tfidf_path = ML_MODELS_PATH / "tfidf_vectorizer.joblib"
             if tfidf_path.exists():
                 self.tfidf_vectorizer = joblib.load(tfidf_path)
             
             # Load sparse matrices
-            item_user_path = ML_MODELS_PATH / "item_user_matrix.npz"
-            if item_user_path.exists():
-                self.item_user_matrix = load_npz(item_user_path)
-            
-            tfidf_matrix_path = ML_MODELS_PATH / "tfidf_matrix.npz"
-            if tfidf_matrix_path.exists():
-                self.tfidf_matrix = load_npz(tfidf_matrix_path)
+            self.item_user_matrix = load_sparse_matrix("item_user_matrix")
+            self.tfidf_matrix = load_sparse_matrix("tfidf_matrix")
+            if self.tfidf_matrix is not None:
+                self.tfidf_dense = _dense_tfidf_copy(self.tfidf_matrix)
+                self._tfidf_empty_rows = _empty_rows(self.tfidf_matrix)
             
             # Load mappings
             mappings_path = ML_MODELS_PATH / "recommendation_mappings.json"
             if mappings_path.exists():
-                with open(mappings_path, "r") as f:
-                    self.mappings = json.load(f)
+                self.mappings = orjson.loads(mappings_path.read_bytes())
+                self._idx_to_product = _index_to_list(
+                    self.mappings.get("idx_to_product", {})
+                )
+                self._cb_idx_to_product = _index_to_list(
+                    self.mappings.get("cb_idx_to_product", {})
+                )
             
             # Load product metadata - scan more rows to find matches
             self._load_metadata_index()
+            self.generation += 1
             
             print("✅ Recommendation models loaded successfully!")
             
@@ -109,61 +179,179 @@ class RecommendationService:
                 return
             
             # Get product ASINs from our ML model
-            model_products = set()
+            model_products = frozenset()
             if self.mappings:
-                model_products = set(self.mappings.get("product_to_idx", {}).keys())
-            
-            print(f"   🔍 Looking for {len(model_products)} products from ML model...")
-            
-            # Scan metadata in batches to find matching products
-            batch_size = 50000
-            offset = 0
-            found = 0
-            
-            while found < len(model_products) and offset < 500000:  # Max 500k rows
-                try:
-                    meta = pl.read_ndjson(
-                        meta_path,
-                        n_rows=batch_size,
-                    ).slice(offset, batch_size)
-                    
-                    if len(meta) == 0:
-                        break
-                    
-                    # Filter to only model products
-                    # Handle both 'parent_asin' and 'asin' column names
-                    for row in meta.iter_rows(named=True):
-                        asin = row.get('parent_asin') or row.get('asin')
-                        if asin and asin in model_products and asin not in self.product_metadata:
-                            self.product_metadata[asin] = row
-                            found += 1
-                    
-                    offset += batch_size
-                    
-                except Exception:
-                    break
+                model_products = frozenset(self.mappings.get("product_to_idx", {}))
             
-            # If we didn't find many, just load first N rows for browsing
-            if len(self.product_metadata) < 100:
-                meta = pl.read_ndjson(meta_path, n_rows=10000)
-                for row in meta.iter_rows(named=True):
-                    # Handle both 'parent_asin' and 'asin' column names
-                    asin = row.get('parent_asin') or row.get('asin')
-                    if asin and asin not in self.product_metadata:
-                        self.product_metadata[asin] = row
+            cache_key = self._metadata_cache_key(meta_path)
+            cached = self._read_metadata_cache(cache_key)
+            if cached is not None:
+                self.product_metadata, self._normalized = cached
+            else:
+                print(
+                    f"   🔍 Looking for {len(model_products)} products from ML model..."
+                )
+                complete = self._scan_metadata(meta_path, model_products)
+                self._normalized = {
+                    asin: self._normalize_product(asin, data)
+                    for asin, data in self.product_metadata.items()
+                }
+                # A failed scan is used for this run only, so the next start retries
+                if complete:
+                    self._write_metadata_cache(cache_key)
             
+            self._details_cache = {}
+            self._with_image_set = {
+                asin for asin, details in self._normalized.items() if details['image_url']
+            }
+            product_to_idx = (
+                self.mappings.get("product_to_idx", {}) if self.mappings else {}
+            )
+            self._available_asins = [
+                asin for asin in product_to_idx if asin in self._with_image_set
+            ]
+            self._build_search_index()
             print(f"   📦 Loaded metadata for {len(self.product_metadata):,} products")
             
         except Exception as e:
             print(f"   ⚠️ Could not load product metadata: {e}")
     
+    def _scan_metadata(self, meta_path: Path, model_products: frozenset[str]) -> bool:
+        """Fill product_metadata with the raw rows of model products from meta_path.
+
+        Returns False if the scan failed partway, leaving product_metadata partial.
+        """
+        # Parse metadata line by line until every model product is found,
+        # keeping only the fields product details use
+        missing = len(model_products - self.product_metadata.keys())
+        workers = settings.METADATA_SCAN_WORKERS
+        try:
+            if not missing:
+                pass
+            elif workers > 1 and meta_path.stat().st_size >= METADATA_PARALLEL_MIN_BYTES:
+                self._scan_metadata_parallel(meta_path, model_products, missing, workers)
+            else:
+                for row in _iter_metadata_rows(meta_path, METADATA_MAX_ROWS):
+                    # Handle both 'parent_asin' and 'asin' column names
+                    asin = row.get('parent_asin') or row.get('asin')
+                    if (
+                        asin
+                        and asin in model_products
+                        and asin not in self.product_metadata
+                    ):
+                        self.product_metadata[asin] = {
+                            c: row.get(c) for c in METADATA_COLUMNS
+                        }
+                        missing -= 1
+                        if not missing:
+                            break
+            complete = True
+        except Exception as e:
+            print(f"   ⚠️ Could not scan product metadata: {e}")
+            complete = False
+
+        # If we didn't find many, just load first N rows for browsing
+        if len(self.product_metadata) < 100:
+            for row in _iter_metadata_rows(meta_path, 10000):
+                # Handle both 'parent_asin' and 'asin' column names
+                asin = row.get('parent_asin') or row.get('asin')
+                if asin and asin not in self.product_metadata:
+                    self.product_metadata[asin] = {
+                        c: row.get(c) for c in METADATA_COLUMNS
+                    }
+        return complete
+
+    def _scan_metadata_parallel(
+        self, meta_path: Path, model_products: frozenset[str], missing: int, workers: int
+    ):
+        """Scan meta_path like _scan_metadata, parsing its chunks in worker processes."""
+        # Several chunks per worker, so a scan that finds everything early can stop
+        # after the first few chunks instead of parsing the whole range
+        chunks = metadata_chunks(meta_path, METADATA_MAX_ROWS, workers * 4)
+        if not chunks:
+            return
+        # Spawned workers start from a fresh interpreter (forking a process that
+        # already runs threads is unsafe) and only import metadata_scan
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(chunks)),
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_worker,
+            initargs=(model_products,),
+        ) as pool:
+            starts, stops = zip(*chunks)
+            # Results come back in file order, so earlier rows still win
+            for found in pool.map(partial(scan_chunk, meta_path), starts, stops):
+                for asin, record in found.items():
+                    if asin not in self.product_metadata:
+                        self.product_metadata[asin] = record
+                        missing -= 1
+                if not missing:
+                    pool.shutdown(cancel_futures=True)
+                    break
+
+    def _metadata_cache_key(self, meta_path: Path) -> str:
+        """Key the metadata cache on the metadata and mappings files' mtimes and sizes."""
+        parts = [str(METADATA_CACHE_VERSION)]
+        for path in (meta_path, ML_MODELS_PATH / "recommendation_mappings.json"):
+            if path.exists():
+                stat = path.stat()
+                parts.append(f"{path.name}:{stat.st_mtime_ns}:{stat.st_size}")
+        return hashlib.sha1("|".join(parts).encode()).hexdigest()[:8]
+
+    def _read_metadata_cache(self, key: str) -> Optional[tuple[dict, dict]]:
+        """Read the raw and normalized metadata cached for key, if any."""
+        path = CACHE_PATH / f"metadata_index_{key}.joblib"
+        if not path.exists():
+            return None
+        try:
+            return joblib.load(path)
+        except Exception as e:
+            print(f"   ⚠️ Ignoring unreadable metadata cache: {e}")
+            return None
+
+    def _write_metadata_cache(self, key: str):
+        """Write the metadata index for the next start (best effort).
+
+        Workers may start together, so the file is written under a temporary name
+        and renamed into place; readers never load a partial file.
+        """
+        path = CACHE_PATH / f"metadata_index_{key}.joblib"
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        try:
+            CACHE_PATH.mkdir(exist_ok=True)
+            joblib.dump((self.product_metadata, self._normalized), tmp_path)
+            os.replace(tmp_path, path)
+            # Drop caches built from older versions of the source files
+            for stale in CACHE_PATH.glob("metadata_index_*.joblib"):
+                if stale != path:
+                    stale.unlink(missing_ok=True)
+        except Exception as e:
+            print(f"   ⚠️ Could not write metadata cache: {e}")
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+    def _build_search_index(self):
+        """Index product titles by character n-gram for search_products."""
+        self._search_titles = [
+            (asin, (data.get('title') or '').lower())
+            for asin, data in self.product_metadata.items()
+        ]
+        title_index = defaultdict(set)
+        for pos, (_, title) in enumerate(self._search_titles):
+            for i in range(len(title) - SEARCH_NGRAM + 1):
+                title_index[title[i:i + SEARCH_NGRAM]].add(pos)
+        self._title_index = dict(title_index)
+
     def get_product_details(self, asin: str) -> Optional[dict]:
-        """Get product details by ASIN."""
-        data = self.product_metadata.get(asin)
+        """Get product details by ASIN.
+
+        Returns a shared record; callers must not modify it.
+        """
+        details = self._normalized.get(asin) or self._details_cache.get(asin)
         
-        if not data:
+        if details is None:
             # Return minimal info for products without metadata
-            return {
+            details = {
                 "asin": asin,
                 "title": f"Product {asin}",
                 "description": "",
@@ -174,7 +362,17 @@ class RecommendationService:
                 "store": None,
                 "categories": []
             }
-        
+            # Only model products are kept, so arbitrary lookups can't grow the cache
+            if self.mappings and (
+                asin in self.mappings.get("product_to_idx", {})
+                or asin in self.mappings.get("cb_product_to_idx", {})
+            ):
+                self._details_cache[asin] = details
+        
+        return details
+
+    def _normalize_product(self, asin: str, data: dict) -> dict:
+        """Build the product details record for one raw metadata row."""
         # Extract first image - check multiple possible field names
         image_url = None
         
@@ -239,55 +437,15 @@ class RecommendationService:
             "categories": categories
         }
     
-    def _has_image(self, data: dict) -> bool:
-        """Check if product data has a valid image URL."""
-        # Check imageURLHighRes
-        image_url_high_res = data.get('imageURLHighRes', [])
-        if image_url_high_res and isinstance(image_url_high_res, list) and len(image_url_high_res) > 0:
-            if isinstance(image_url_high_res[0], str) and image_url_high_res[0]:
-                return True
-        
-        # Check imageURL
-        image_url_list = data.get('imageURL', [])
-        if image_url_list and isinstance(image_url_list, list) and len(image_url_list) > 0:
-            if isinstance(image_url_list[0], str) and image_url_list[0]:
-                return True
-        
-        # Check images (nested dict format)
-        images = data.get('images', [])
-        if images and isinstance(images, list) and len(images) > 0:
-            first_img = images[0]
-            if isinstance(first_img, dict):
-                img_url = first_img.get('hi_res') or first_img.get('large') or first_img.get('thumb')
-                if img_url:
-                    return True
-            elif isinstance(first_img, str) and first_img:
-                return True
-        
-        return False
-    
     def _enrich_recommendations(self, recommendations: list[dict]) -> list[dict]:
         """Add product details to recommendations - only include products WITH images."""
+        normalized = self._normalized
         enriched = []
         for rec in recommendations:
-            asin = rec.get('asin', '')
-            details = self.get_product_details(asin)
-            
-            # Only include products with images
-            if not details.get('image_url'):
-                continue
-            
-            enriched.append({
-                **rec,
-                "title": details.get('title', f'Product {asin}'),
-                "description": details.get('description', ''),
-                "image_url": details.get('image_url'),  # Use actual image from metadata
-                "price": details.get('price'),
-                "rating": details.get('rating'),
-                "rating_count": details.get('rating_count'),
-                "store": details.get('store'),
-                "categories": details.get('categories', [])
-            })
+            details = normalized.get(rec['asin'])
+            # Only include products with images (products without metadata have none)
+            if details is not None and details['image_url']:
+                enriched.append({**rec, **details})
         
         return enriched
     
@@ -295,7 +453,6 @@ class RecommendationService:
     def is_ready(self) -> bool:
         """Check if models are loaded and ready."""
         return all([
-            self.knn_model is not None,
             self.item_user_matrix is not None,
             self.mappings is not None
         ])
@@ -305,28 +462,35 @@ class RecommendationService:
         product_asin: str, 
         n_recommendations: int = 5
     ) -> list[dict]:
-        """Get recommendations using Collaborative Filtering (Item-based KNN)."""
+        """Get Collaborative Filtering recommendations (item-based cosine neighbors)."""
         if not self.is_ready:
             return []
         
         product_to_idx = self.mappings.get("product_to_idx", {})
-        idx_to_product = self.mappings.get("idx_to_product", {})
+        idx_to_product = self._idx_to_product
         
         if product_asin not in product_to_idx:
             return []
         
         product_idx = product_to_idx[product_asin]
         
-        distances, indices = self.knn_model.kneighbors(
-            self.item_user_matrix[product_idx].reshape(1, -1),
-            n_neighbors=n_recommendations + 1
-        )
+        # Rows are L2-normalized, so one sparse product gives the cosine similarity
+        # to every product, the same neighbors the fitted KNN model would return
+        row = self.item_user_matrix.getrow(product_idx)
+        similarities = (self.item_user_matrix @ row.T).toarray().ravel()
+        # Exclude the product itself by index; products bought by the same users
+        # can tie with it at similarity 1.0
+        similarities[product_idx] = -np.inf
+
+        k = min(n_recommendations, len(similarities) - 1)
+        top = np.argpartition(similarities, -k)[-k:] if k > 0 else np.empty(0, dtype=int)
+        neighbors = top[np.argsort(-similarities[top])]
         
         recommendations = []
-        for i, idx in enumerate(indices[0][1:]):
+        for idx in neighbors:
             recommendations.append({
-                "asin": idx_to_product.get(str(idx), ""),
-                "similarity": round(float(1 - distances[0][i+1]), 3),
+                "asin": idx_to_product[idx],
+                "similarity": round(float(similarities[idx]), 3),
                 "method": "collaborative"
             })
         
@@ -342,24 +506,88 @@ class RecommendationService:
             return []
         
         cb_product_to_idx = self.mappings.get("cb_product_to_idx", {})
-        cb_idx_to_product = self.mappings.get("cb_idx_to_product", {})
         
         if product_asin not in cb_product_to_idx:
             return []
         
         idx = cb_product_to_idx[product_asin]
         
-        similarities = cosine_similarity(
-            self.tfidf_matrix[idx], 
-            self.tfidf_matrix
-        ).flatten()
+        similarities = self._tfidf_similarities([idx])[0]
         
-        similar_indices = similarities.argsort()[::-1][1:n_recommendations+1]
+        return self._content_recommendations_from_similarities(
+            similarities, idx, n_recommendations
+        )
+
+    def get_content_recommendations_batch(
+        self,
+        product_asins: list[str],
+        n_recommendations: int = 5
+    ) -> dict[str, list[dict]]:
+        """Get Content-Based recommendations for several products at once.
+
+        All query rows go through a single sparse similarity product instead of
+        one per product. Unknown ASINs map to an empty list.
+        """
+        results: dict[str, list[dict]] = {asin: [] for asin in product_asins}
+        if self.tfidf_matrix is None or self.mappings is None:
+            return results
+
+        cb_product_to_idx = self.mappings.get("cb_product_to_idx", {})
+        known = [asin for asin in results if asin in cb_product_to_idx]
+        if not known:
+            return results
+
+        rows = [cb_product_to_idx[asin] for asin in known]
+        similarities = self._tfidf_similarities(rows)
+
+        for asin, row, row_similarities in zip(known, rows, similarities):
+            results[asin] = self._content_recommendations_from_similarities(
+                row_similarities, row, n_recommendations
+            )
+
+        return results
+
+    def _tfidf_similarities(self, rows: list[int]) -> np.ndarray:
+        """Cosine similarity of the given TF-IDF rows against every product."""
+        if self.tfidf_dense is not None:
+            distances = simsimd.cdist(
+                self.tfidf_dense[rows], self.tfidf_dense, metric='cosine'
+            )
+            similarities = 1.0 - np.asarray(distances)
+            # SimSIMD puts two all-zero rows at distance 0, where the sparse product
+            # scores products without TF-IDF terms 0 against everything
+            similarities[:, self._tfidf_empty_rows] = 0.0
+            return similarities
+
+        # Rows are L2-normalized, so the dot product is the cosine similarity
+        return (self.tfidf_matrix[rows] @ self.tfidf_matrix.T).toarray()
+
+    def _content_recommendations_from_similarities(
+        self,
+        similarities,
+        product_idx: int,
+        n_recommendations: int
+    ) -> list[dict]:
+        """Turn product_idx's row of TF-IDF similarities into enriched recommendations.
+
+        The row is modified in place.
+        """
+        cb_idx_to_product = self._cb_idx_to_product
+
+        # Exclude the product itself by index; products with the same title and
+        # categories tie with it at similarity 1.0
+        similarities[product_idx] = -np.inf
+
+        # Partition out the top k and only sort those, instead of sorting every
+        # product's similarity
+        k = min(n_recommendations, len(similarities) - 1)
+        top = np.argpartition(similarities, -k)[-k:] if k > 0 else np.empty(0, dtype=int)
+        similar_indices = top[np.argsort(-similarities[top])]
         
         recommendations = []
         for i in similar_indices:
             recommendations.append({
-                "asin": cb_idx_to_product.get(str(i), ""),
+                "asin": cb_idx_to_product[i],
                 "similarity": round(float(similarities[i]), 3),
                 "method": "content"
             })
@@ -385,28 +613,28 @@ class RecommendationService:
         if not cb_recs:
             return cf_recs[:n_recommendations]
         
-        scores = {}
-        product_data = {}
         cb_weight = 1 - cf_weight
+        all_recs = cf_recs + cb_recs
+        asins = np.array([rec["asin"] for rec in all_recs])
+        weighted = np.array(
+            [(rec.get("similarity", 0) or 0) for rec in all_recs], dtype=np.float64
+        )
+        weighted[:len(cf_recs)] *= cf_weight
+        weighted[len(cf_recs):] *= cb_weight
         
-        for rec in cf_recs:
-            asin = rec["asin"]
-            scores[asin] = (rec.get("similarity", 0) or 0) * cf_weight
-            product_data[asin] = rec
-        
-        for rec in cb_recs:
-            asin = rec["asin"]
-            if asin in scores:
-                scores[asin] += (rec.get("similarity", 0) or 0) * cb_weight
-            else:
-                scores[asin] = (rec.get("similarity", 0) or 0) * cb_weight
-                product_data[asin] = rec
+        # Sum the weighted similarities of products recommended by both methods
+        uniq, first, inverse = np.unique(asins, return_index=True, return_inverse=True)
+        scores = np.zeros(len(uniq), dtype=np.float64)
+        np.add.at(scores, inverse, weighted)
         
-        sorted_recs = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+        # Highest score first; ties keep the order the products were first seen in
+        top = np.lexsort((first, -scores))[:n_recommendations]
         
         results = []
-        for asin, score in sorted_recs[:n_recommendations]:
-            data = product_data.get(asin, {})
+        for i in top:
+            asin = str(uniq[i])
+            score = float(scores[i])
+            data = all_recs[first[i]]
             # Only include products with images
             if not data.get("image_url"):
                 continue
@@ -417,7 +645,7 @@ class RecommendationService:
                 "title": data.get("title", f"Product {asin}"),
                 "description": data.get("description", ""),
                 "image_url": data.get("image_url"),
-                "price": _parse_price(data.get("price")),
+                "price": data.get("price"),  # Parsed when the metadata was loaded
                 "rating": data.get("rating"),
                 "rating_count": data.get("rating_count"),
                 "store": data.get("store"),
@@ -431,26 +659,10 @@ class RecommendationService:
         if not self.mappings:
             return {"products": [], "total": 0, "offset": 0, "limit": limit}
         
-        # Only get products that have metadata AND images
-        products_with_images = []
-        all_products = list(self.mappings.get("product_to_idx", {}).keys())
-        
-        for asin in all_products:
-            if asin in self.product_metadata:
-                data = self.product_metadata[asin]
-                if self._has_image(data):
-                    products_with_images.append(asin)
-        
-        # Only return products with images
-        total = len(products_with_images)
-        paginated_asins = products_with_images[offset:offset + limit]
-        
-        products = []
-        for asin in paginated_asins:
-            details = self.get_product_details(asin)
-            if details and details.get('image_url'):
-                # Only include products with images
-                products.append(details)
+        # Model products that have metadata AND images, collected at load time
+        total = len(self._available_asins)
+        page = self._available_asins[offset:offset + limit]
+        products = [self.get_product_details(asin) for asin in page]
         
         return {
             "products": products,
@@ -467,8 +679,23 @@ class RecommendationService:
         query_lower = query.lower()
         results = []
         
-        for asin, data in self.product_metadata.items():
-            title = data.get('title', '').lower()
+        # Every n-gram of the query must occur in a matching title, so only titles
+        # in all of their posting lists need the full substring check
+        grams = {
+            query_lower[i:i + SEARCH_NGRAM]
+            for i in range(len(query_lower) - SEARCH_NGRAM + 1)
+        }
+        candidates: Sequence[int]
+        if grams:
+            postings = sorted(
+                (self._title_index.get(gram, set()) for gram in grams), key=len
+            )
+            candidates = sorted(set.intersection(*postings))
+        else:
+            candidates = range(len(self._search_titles))
+
+        for pos in candidates:
+            asin, title = self._search_titles[pos]
             if query_lower in title:
                 details = self.get_product_details(asin)
                 if details:
@@ -489,7 +716,6 @@ class RecommendationService:
             "products_with_content": len(self.mappings.get("cb_product_to_idx", {})),
             "products_with_metadata": len(self.product_metadata),
             "models_loaded": {
-                "knn": self.knn_model is not None,
                 "tfidf": self.tfidf_vectorizer is not None,
                 "item_user_matrix": self.item_user_matrix is not None,
                 "tfidf_matrix": self.tfidf_matrix is not None,
@@ -497,5 +723,11 @@ class RecommendationService:
         }
 
 
+@cache
+def get_recommendation_service() -> RecommendationService:
+    """Return the process-wide RecommendationService, loading it on first use."""
+    return RecommendationService()
+
+
 # Global instance
-recommendation_service = RecommendationService()
+recommendation_service = get_recommendation_service()
@@ -6,6 +6,7 @@ from asgi_lifespan import LifespanManager
 from fastapi import FastAPI
 from httpx import ASGITransport, AsyncClient
 
+from app.cli import ensure_superuser
 from app.config.config import settings
 from app.main import app
 
@@ -31,6 +32,7 @@ async def client() -> AsyncGenerator[AsyncClient, None]:
     """Async server client that handles lifespan and teardown"""
     with patch("app.config.config.settings.MONGO_DB", MONGO_TEST_DB):
         async with LifespanManager(app):
+            await ensure_superuser()
             async with AsyncClient(
                 transport=ASGITransport(app=app), base_url="http://test"
             ) as client:
@@ -40,6 +42,15 @@ async def client() -> AsyncGenerator[AsyncClient, None]:
                     await clear_database(app)
 
 
+@pytest.fixture()
+async def api_client() -> AsyncGenerator[AsyncClient, None]:
+    """Async server client without lifespan, for the APIs that don't use MongoDB"""
+    async with AsyncClient(
+        transport=ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        yield client
+
+
 @pytest.fixture()
 async def superuser_token_headers(client: AsyncClient) -> dict[str, str]:
     return await get_user_auth_headers(
@@ -0,0 +1,91 @@
+import numpy as np
+import orjson
+import pytest
+from httpx import AsyncClient
+
+from app.config.config import settings
+from app.routers import demand
+from app.services.demand_service import demand_service
+
+
+def test_streamed_product_demand_matches_buffered_body() -> None:
+    num_weeks = demand.STREAM_THRESHOLD + demand.STREAM_CHUNK_SIZE + 3
+    data = {
+        "asin": "B000000001",
+        "title": "Test product",
+        "total_demand": 3 * num_weeks,
+        "avg_demand": np.float64(3.0),
+        "max_demand": 5,
+        "min_demand": 1,
+        "trend": "stable",
+        "time_series": {
+            "weeks": [f"2020-W{i:04d}" for i in range(num_weeks)],
+            "demand": [i % 5 + 1 for i in range(num_weeks)],
+            "rating": [None if i % 7 == 0 else 4.5 for i in range(num_weeks)],
+        },
+    }
+    streamed = b"".join(demand._stream_product_demand(data))
+    assert streamed == orjson.dumps(data, option=demand.ORJSON_OPTIONS)
+
+
+@pytest.mark.anyio
+async def test_get_product_demand_streams_long_series(api_client: AsyncClient) -> None:
+    if not demand_service.is_ready:
+        pytest.skip("demand data not available")
+    counts = demand_service.weekly_demand["parent_asin"].value_counts()
+    long_series = counts.filter(counts["count"] > demand.STREAM_THRESHOLD)
+    if long_series.is_empty():
+        pytest.skip("no product has a series long enough to stream")
+    asin = long_series["parent_asin"][0]
+
+    r = await api_client.get(f"{settings.API_V1_STR}/demand/product/{asin}")
+    assert r.status_code == 200
+    expected = demand_service.get_product_demand(asin)
+    assert r.content == orjson.dumps(expected, option=demand.ORJSON_OPTIONS)
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "path", ["/demand/product/not-an-asin", "/demand/forecast/B00004RIX%21"]
+)
+async def test_invalid_asin_path_is_rejected(api_client: AsyncClient, path: str) -> None:
+    r = await api_client.get(f"{settings.API_V1_STR}{path}")
+    assert r.status_code == 422
+
+
+@pytest.mark.anyio
+async def test_aggregates_revalidate_with_etag(api_client: AsyncClient) -> None:
+    url = f"{settings.API_V1_STR}/demand/categories"
+    r = await api_client.get(url)
+    assert r.status_code == 200
+    etag = r.headers["etag"]
+    assert etag.startswith('W/"')
+    assert "max-age" in r.headers["cache-control"]
+
+    for if_none_match in (etag, etag.removeprefix("W/"), f'"stale", {etag}'):
+        cached = await api_client.get(url, headers={"if-none-match": if_none_match})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["etag"] == etag
+
+    stale = await api_client.get(url, headers={"if-none-match": '"stale"'})
+    assert stale.status_code == 200
+    assert stale.content == r.content
+
+
+@pytest.mark.anyio
+async def test_aggregate_etag_changes_with_data_generation(
+    api_client: AsyncClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    url = f"{settings.API_V1_STR}/demand/top-products?limit=3"
+    first = await api_client.get(url)
+    reloaded_products = [{"asin": "B000000000", "title": "Reloaded"}]
+    monkeypatch.setattr(
+        demand_service, "get_top_products", lambda limit: reloaded_products
+    )
+    assert (await api_client.get(url)).content == first.content
+
+    monkeypatch.setattr(demand_service, "generation", demand_service.generation + 1)
+    reloaded = await api_client.get(url, headers={"if-none-match": first.headers["etag"]})
+    assert reloaded.status_code == 200
+    assert reloaded.json() == reloaded_products
@@ -0,0 +1,122 @@
+import asyncio
+import threading
+
+import pytest
+from cachetools import TTLCache
+from httpx import AsyncClient
+
+from app.config.config import settings
+from app.routers import recommendations
+from app.services.recommendation_service import recommendation_service
+
+BATCH_URL = f"{settings.API_V1_STR}/recommendations/content/batch"
+
+
+@pytest.mark.anyio
+async def test_content_batch(api_client: AsyncClient) -> None:
+    if not recommendation_service.is_ready:
+        pytest.skip("recommendation models not available")
+    asins = list(recommendation_service.mappings["cb_product_to_idx"])[:3]
+    unknown = "B000000000"
+
+    r = await api_client.post(BATCH_URL, json={"asins": [*asins, unknown], "n": 4})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["method"] == "content"
+    assert list(body["results"]) == [*asins, unknown]
+    assert body["results"][unknown] == []
+    for asin in asins:
+        expected = recommendation_service.get_content_recommendations(asin, 4)
+        assert body["results"][asin] == expected
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "content",
+    [
+        b'{"asins": []}',
+        b'{"asins": ["not-an-asin"]}',
+        b'{"asins": ["B000000000"], "n": 0}',
+        b'{"asins": ["B000000000"]',
+        b'{"asins": ["B000000000"], "limit": 3}',
+    ],
+    ids=["empty", "bad-asin", "bad-n", "malformed", "unknown-field"],
+)
+async def test_content_batch_rejects_invalid_body(
+    api_client: AsyncClient, content: bytes
+) -> None:
+    r = await api_client.post(
+        BATCH_URL, content=content, headers={"content-type": "application/json"}
+    )
+    assert r.status_code == 422
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize(
+    "path",
+    [
+        "/recommendations/product/b00004rixi",
+        "/recommendations/collaborative/B00004RIX",
+        "/recommendations/content/B00004RIXI1",
+        "/recommendations/hybrid/B00004-IXI",
+    ],
+)
+async def test_invalid_asin_path_is_rejected(api_client: AsyncClient, path: str) -> None:
+    r = await api_client.get(f"{settings.API_V1_STR}{path}")
+    assert r.status_code == 422
+
+
+@pytest.mark.anyio
+async def test_cached_reuses_results_until_expiry_or_reload(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    now = [0.0]
+    monkeypatch.setattr(
+        recommendations, "_cache", TTLCache(maxsize=10, ttl=300, timer=lambda: now[0])
+    )
+    calls: list[int] = []
+
+    def compute(x: int) -> list[int]:
+        calls.append(x)
+        return [x, len(calls)]
+
+    assert await recommendations._cached("test", compute, 1) == [1, 1]
+    assert await recommendations._cached("test", compute, 1) == [1, 1]
+    assert await recommendations._cached("test", compute, 2) == [2, 2]
+    assert calls == [1, 2]
+
+    now[0] = 301
+    assert await recommendations._cached("test", compute, 1) == [1, 3]
+
+    monkeypatch.setattr(
+        recommendation_service, "generation", recommendation_service.generation + 1
+    )
+    assert await recommendations._cached("test", compute, 1) == [1, 4]
+
+
+@pytest.mark.anyio
+async def test_cached_coalesces_concurrent_misses(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(recommendations, "_cache", TTLCache(maxsize=10, ttl=300))
+    monkeypatch.setattr(recommendations, "_inflight", {})
+    release = threading.Event()
+    calls: list[int] = []
+
+    def compute(x: int) -> list[int]:
+        calls.append(x)
+        release.wait(timeout=5)
+        return [x]
+
+    waiters = [
+        asyncio.ensure_future(recommendations._cached("test", compute, 1))
+        for _ in range(5)
+    ]
+    # Let every waiter look up the key before the computation finishes
+    await asyncio.sleep(0)
+    release.set()
+    assert await asyncio.gather(*waiters) == [[1]] * 5
+    assert calls == [1]
+    assert not recommendations._inflight
+    assert await recommendations._cached("test", compute, 1) == [1]
+    assert calls == [1]
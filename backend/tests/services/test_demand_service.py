@@ -0,0 +1,179 @@
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import numpy as np
+import orjson
+import pytest
+from polars.testing import assert_frame_equal
+
+from app.services import demand_service as demand_module
+from app.services.demand_service import DemandService, _ForecastState, demand_service
+
+
+def _write_dataset(path: Path, num_reviews: int) -> None:
+    """Write a small reviews file and metadata for three products."""
+    reviews = [
+        {
+            "reviewerID": f"U{i}",
+            "overall": float(i % 5 + 1),
+            "asin": f"B00000000{i % 3}",
+            "unixReviewTime": 1_600_000_000 + i * 86_400,
+        }
+        for i in range(num_reviews)
+    ]
+    meta = [
+        {
+            "parent_asin": f"B00000000{i}",
+            "title": f"Product {i}",
+            "categories": ["Kitchen"],
+        }
+        for i in range(3)
+    ]
+    for name, rows in (
+        ("Home_and_Kitchen.jsonl", reviews),
+        ("meta_Home_and_Kitchen.jsonl", meta),
+    ):
+        (path / name).write_bytes(b"\n".join(orjson.dumps(row) for row in rows) + b"\n")
+
+
+@pytest.fixture
+def load_demand_service(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> Callable[[], DemandService]:
+    """Build fresh DemandService instances over the files in tmp_path."""
+    monkeypatch.setattr(demand_module, "DATASET_PATH", tmp_path)
+    monkeypatch.setattr(demand_module, "CACHE_PATH", tmp_path / ".cache")
+
+    def load() -> DemandService:
+        monkeypatch.setattr(DemandService, "_instance", None)
+        return DemandService()
+
+    return load
+
+
+def test_load_data_reuses_and_invalidates_parquet_cache(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    load_demand_service: Callable[[], DemandService],
+) -> None:
+    aggregations: list[Path] = []
+    aggregate_reviews = DemandService._aggregate_reviews
+
+    def counting_aggregate_reviews(self: DemandService, reviews_path: Path):
+        aggregations.append(reviews_path)
+        return aggregate_reviews(self, reviews_path)
+
+    monkeypatch.setattr(DemandService, "_aggregate_reviews", counting_aggregate_reviews)
+
+    _write_dataset(tmp_path, 60)
+    first = load_demand_service()
+    assert len(aggregations) == 1
+    cache_files = sorted((tmp_path / ".cache").glob("*.parquet"))
+    assert len(cache_files) == len(demand_module.CACHE_TABLES)
+
+    cached = load_demand_service()
+    assert len(aggregations) == 1
+    assert cached.weekly_demand is not None and first.weekly_demand is not None
+    assert_frame_equal(cached.weekly_demand, first.weekly_demand)
+    assert_frame_equal(cached.product_stats, first.product_stats)
+    assert cached.metadata == first.metadata
+
+    _write_dataset(tmp_path, 90)
+    reloaded = load_demand_service()
+    assert len(aggregations) == 2
+    assert reloaded.product_stats is not None
+    assert reloaded.product_stats["total_demand"].sum() == 90
+    # Tables cached from the old source files are replaced
+    assert sorted((tmp_path / ".cache").glob("*.parquet")) != cache_files
+    assert len(list((tmp_path / ".cache").glob("*.parquet"))) == len(cache_files)
+
+
+def test_load_data_rebuilds_cache_missing_a_table(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    load_demand_service: Callable[[], DemandService],
+) -> None:
+    aggregations: list[Path] = []
+    aggregate_reviews = DemandService._aggregate_reviews
+
+    def counting_aggregate_reviews(self: DemandService, reviews_path: Path):
+        aggregations.append(reviews_path)
+        return aggregate_reviews(self, reviews_path)
+
+    monkeypatch.setattr(DemandService, "_aggregate_reviews", counting_aggregate_reviews)
+
+    _write_dataset(tmp_path, 60)
+    first = load_demand_service()
+    (metadata_file,) = (tmp_path / ".cache").glob("metadata_*.parquet")
+    metadata_file.unlink()
+
+    rebuilt = load_demand_service()
+    assert len(aggregations) == 2
+    assert rebuilt.metadata == first.metadata
+    assert metadata_file.exists()
+    # No temporary files are left behind next to the renamed tables
+    assert not list((tmp_path / ".cache").glob("*.tmp"))
+
+    # Without a metadata source the cached empty table is still a hit
+    (tmp_path / "meta_Home_and_Kitchen.jsonl").unlink()
+    without_metadata = load_demand_service()
+    assert len(aggregations) == 3
+    assert without_metadata.metadata == {}
+    assert load_demand_service().metadata == {}
+    assert len(aggregations) == 3
+
+
+def _list_forecast(model: Optional[Any], demands: list[int], weeks: int) -> list[float]:
+    """The forecast loop over a growing history list that _ForecastState replaced."""
+    historical = [float(d) for d in demands]
+    historical_std = float(np.std(historical[-8:]))
+    trend = float(np.mean(historical[-4:]) - np.mean(historical[-8:-4]))
+    forecasts: list[float] = []
+    for i in range(weeks):
+        last_4 = historical[-4:]
+        rolling_mean_4 = float(np.mean(last_4))
+        rolling_std_4 = float(np.std(last_4))
+        if rolling_std_4 < 0.05:
+            rolling_std_4 = max(0.1, rolling_mean_4 * 0.15)
+        if model is None:
+            variation = historical_std * 0.3 * (1 if (i % 2 == 0) else -1)
+            pred = max(0.1, rolling_mean_4 + variation + trend * (i + 1) * 0.1)
+        else:
+            features = [
+                [
+                    historical[-1],
+                    historical[-2],
+                    historical[-4],
+                    rolling_mean_4,
+                    rolling_std_4,
+                ]
+            ]
+            pred = max(0.1, float(model.predict(np.array(features))[0]))
+            if i > 0 and abs(pred - forecasts[-1]) < 0.15:
+                direction = 1 if (i % 2 == 0) else -1
+                variation = max(historical_std * 0.5, 0.2) * direction * (1 + i * 0.15)
+                pred = max(0.1, rolling_mean_4 + variation + trend * (i + 1) * 0.15)
+        forecasts.append(round(pred, 2))
+        historical.append(pred)
+    return forecasts
+
+
+@pytest.mark.parametrize("use_model", [True, False], ids=["model", "fallback"])
+def test_forecast_state_matches_list_forecast(use_model: bool) -> None:
+    model = demand_service.forecast_model if use_model else None
+    if use_model and model is None:
+        pytest.skip("forecast model not available")
+    rng = np.random.default_rng(0)
+    histories = [
+        rng.integers(1, 9, size=rng.integers(10, 40)).tolist() for _ in range(50)
+    ]
+    histories += [[3] * 12, [1, 2] * 6]
+    for demands in histories:
+        state = _ForecastState(demands)
+        for i in range(16):
+            pred = None
+            if model is not None:
+                pred = float(model.predict(np.array([state.features()]))[0])
+            state.advance(i, pred)
+        forecast = [point["demand"] for point in state.forecasts]
+        assert forecast == _list_forecast(model, demands, 16)
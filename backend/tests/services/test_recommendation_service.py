@@ -0,0 +1,198 @@
+from pathlib import Path
+from typing import Iterator
+
+import numpy as np
+import orjson
+import pytest
+from scipy.sparse import csr_matrix
+
+from app.services import recommendation_service as recommendation_module
+from app.services.model_files import prepare_tfidf_matrix
+from app.services.recommendation_service import (
+    RecommendationService,
+    _empty_rows,
+    recommendation_service,
+)
+
+
+def test_dense_similarities_match_sparse_top_n(monkeypatch: pytest.MonkeyPatch) -> None:
+    pytest.importorskip("simsimd")
+    if recommendation_service.tfidf_matrix is None or not recommendation_service.mappings:
+        pytest.skip("content model not available")
+    asins = list(recommendation_service.mappings["cb_product_to_idx"])
+    rows = list(range(len(asins)))
+
+    monkeypatch.setattr(recommendation_service, "tfidf_dense", None)
+    sparse_similarities = recommendation_service._tfidf_similarities(rows)
+    sparse_recs = recommendation_service.get_content_recommendations_batch(asins, 20)
+
+    dense = recommendation_service.tfidf_matrix.toarray()
+    monkeypatch.setattr(recommendation_service, "tfidf_dense", dense)
+    dense_similarities = recommendation_service._tfidf_similarities(rows)
+    dense_recs = recommendation_service.get_content_recommendations_batch(asins, 20)
+
+    np.testing.assert_allclose(dense_similarities, sparse_similarities, atol=1e-5)
+    assert dense_recs == sparse_recs
+
+
+def test_dense_similarities_score_empty_rows_zero(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    pytest.importorskip("simsimd")
+    # Rows 1 and 3 have no TF-IDF terms, like products with an empty description
+    matrix = prepare_tfidf_matrix(
+        csr_matrix(
+            np.array(
+                [[1, 2, 0], [0, 0, 0], [0, 1, 3], [0, 0, 0], [2, 0, 1]], dtype=np.float64
+            )
+        )
+    )
+    rows = list(range(matrix.shape[0]))
+    monkeypatch.setattr(recommendation_service, "tfidf_matrix", matrix)
+    monkeypatch.setattr(recommendation_service, "_tfidf_empty_rows", _empty_rows(matrix))
+
+    monkeypatch.setattr(recommendation_service, "tfidf_dense", None)
+    sparse_similarities = recommendation_service._tfidf_similarities(rows)
+    monkeypatch.setattr(recommendation_service, "tfidf_dense", matrix.toarray())
+    dense_similarities = recommendation_service._tfidf_similarities(rows)
+
+    np.testing.assert_allclose(dense_similarities, sparse_similarities, atol=1e-5)
+    assert not dense_similarities[[1, 3]].any()
+    assert not dense_similarities[:, [1, 3]].any()
+
+
+def _write_metadata(path: Path, asins: list[str], title: str) -> None:
+    rows = [
+        {
+            "parent_asin": asin,
+            "title": f"{title} {i}",
+            "price": "$1,299.00",
+            "categories": ["Kitchen", "Mugs"],
+            "images": [{"hi_res": f"http://img/{asin}.jpg"}],
+        }
+        for i, asin in enumerate(asins)
+    ]
+    path.write_bytes(b"\n".join(orjson.dumps(row) for row in rows) + b"\n")
+
+
+def test_metadata_index_cache_is_reused_and_invalidated(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    if not recommendation_service.mappings:
+        pytest.skip("recommendation mappings not available")
+    monkeypatch.setattr(recommendation_module, "DATASET_PATH", tmp_path)
+    monkeypatch.setattr(recommendation_module, "CACHE_PATH", tmp_path / ".cache")
+    scans: list[Path] = []
+    scan_metadata = RecommendationService._scan_metadata
+
+    def counting_scan_metadata(self, meta_path, model_products):
+        scans.append(meta_path)
+        return scan_metadata(self, meta_path, model_products)
+
+    monkeypatch.setattr(RecommendationService, "_scan_metadata", counting_scan_metadata)
+    asins = list(recommendation_service.mappings["product_to_idx"])[:3]
+    meta_path = tmp_path / "meta_Home_and_Kitchen.jsonl"
+
+    _write_metadata(meta_path, asins, "Mug")
+    first = RecommendationService()
+    assert len(scans) == 1
+    details = first.get_product_details(asins[0])
+    assert details is not None
+    assert details["title"] == "Mug 0"
+    assert details["price"] == 1299.0
+    cache_files = list((tmp_path / ".cache").glob("metadata_index_*.joblib"))
+    assert len(cache_files) == 1
+
+    cached = RecommendationService()
+    assert len(scans) == 1
+    assert cached.product_metadata == first.product_metadata
+    assert cached._normalized == first._normalized
+    assert cached._available_asins == first._available_asins
+
+    _write_metadata(meta_path, asins, "Kettle")
+    reloaded = RecommendationService()
+    assert len(scans) == 2
+    assert reloaded._normalized[asins[0]]["title"] == "Kettle 0"
+    remaining = list((tmp_path / ".cache").glob("metadata_index_*.joblib"))
+    assert len(remaining) == 1 and remaining != cache_files
+    assert not list((tmp_path / ".cache").glob("*.tmp"))
+
+
+def test_failed_metadata_scan_is_not_cached(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    if not recommendation_service.mappings:
+        pytest.skip("recommendation mappings not available")
+    monkeypatch.setattr(recommendation_module, "DATASET_PATH", tmp_path)
+    monkeypatch.setattr(recommendation_module, "CACHE_PATH", tmp_path / ".cache")
+    iter_metadata_rows = recommendation_module._iter_metadata_rows
+
+    def failing_iter_metadata_rows(meta_path: Path, max_rows: int) -> Iterator[dict]:
+        rows = iter_metadata_rows(meta_path, max_rows)
+        if max_rows == recommendation_module.METADATA_MAX_ROWS:
+            # The model product scan breaks off after its first row
+            yield next(rows)
+            raise OSError("read interrupted")
+        yield from rows
+
+    monkeypatch.setattr(
+        recommendation_module, "_iter_metadata_rows", failing_iter_metadata_rows
+    )
+    asins = list(recommendation_service.mappings["product_to_idx"])[:3]
+    _write_metadata(tmp_path / "meta_Home_and_Kitchen.jsonl", asins, "Mug")
+
+    partial = RecommendationService()
+    assert asins[0] in partial.product_metadata
+    assert not list((tmp_path / ".cache").glob("metadata_index_*"))
+
+    monkeypatch.setattr(recommendation_module, "_iter_metadata_rows", iter_metadata_rows)
+    complete = RecommendationService()
+    assert all(asin in complete.product_metadata for asin in asins)
+    assert len(list((tmp_path / ".cache").glob("metadata_index_*.joblib"))) == 1
+
+
+def _rec(asin: str, similarity: float, method: str, image: bool = True) -> dict:
+    return {
+        "asin": asin,
+        "similarity": similarity,
+        "method": method,
+        "title": f"Title {asin}",
+        "image_url": f"http://img/{asin}.jpg" if image else None,
+        "price": None,
+        "categories": [],
+    }
+
+
+def test_hybrid_merges_scores_in_rank_order(monkeypatch: pytest.MonkeyPatch) -> None:
+    cf_recs = [
+        _rec("A", 0.9, "collaborative"),
+        _rec("C", 0.95, "collaborative", image=False),
+        _rec("B", 0.5, "collaborative"),
+        _rec("G", 0.6, "collaborative"),
+        _rec("D", 0.3, "collaborative"),
+    ]
+    cb_recs = [
+        _rec("B", 0.8, "content"),
+        _rec("E", 0.6, "content"),
+        _rec("A", 0.1, "content"),
+        _rec("F", 0.3, "content"),
+    ]
+    monkeypatch.setattr(
+        recommendation_service, "get_collaborative_recommendations", lambda a, n: cf_recs
+    )
+    monkeypatch.setattr(
+        recommendation_service, "get_content_recommendations", lambda a, n: cb_recs
+    )
+
+    results = recommendation_service.get_hybrid_recommendations("X", 5, cf_weight=0.5)
+
+    # Products found by both methods sum their weighted similarities; C ranks third
+    # but has no image, and the G/E tie keeps the order they were first seen in
+    assert [(r["asin"], r["score"]) for r in results] == [
+        ("B", 0.65),
+        ("A", 0.5),
+        ("G", 0.3),
+        ("E", 0.3),
+    ]
+    assert all(r["method"] == "hybrid" for r in results)
+    assert results[0]["title"] == "Title B"
@@ -775,7 +775,10 @@ export default function DemandDashboard() {
                             Weekly Demand Timeline
                           </Typography>
                           <PlotlyBarChart
-                            data={productDemand.time_series.map((t) => ({ label: t.week, value: t.demand }))}
+                            data={productDemand.time_series.weeks.map((week, i) => ({
+                              label: week,
+                              value: productDemand.time_series.demand[i],
+                            }))}
                             height={250}
                             color={
                               productDemand.trend === 'increasing'
@@ -23,10 +23,11 @@ export interface TopProduct {
   avg_rating: number | null
 }
 
-export interface TimeSeriesPoint {
-  week: string
-  demand: number
-  rating: number | null
+// Columnar series: weeks[i], demand[i] and rating[i] describe the same week
+export interface TimeSeries {
+  weeks: string[]
+  demand: number[]
+  rating: (number | null)[]
 }
 
 export interface ProductDemand {
@@ -37,7 +38,7 @@ export interface ProductDemand {
   max_demand: number
   min_demand: number
   trend: string
-  time_series: TimeSeriesPoint[]
+  time_series: TimeSeries
 }
 
 export interface OverallTrend {
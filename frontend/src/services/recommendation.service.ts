@@ -34,7 +34,6 @@ export interface RecommendationStats {
   products_with_content: number
   products_with_metadata: number
   models_loaded: {
-    knn: boolean
     tfidf: boolean
     item_user_matrix: boolean
     tfidf_matrix: boolean